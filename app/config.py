@@ -10,4 +10,90 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 REDIS_BROKER = os.getenv("REDIS_BROKER")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL") 
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
\ No newline at end of file
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+# Scoring pipeline concurrency (number of in-flight calls per stage)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Number of texts sent to Ollama per embedding request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+# Pack up to this many posts (and estimated prompt tokens) into one LLM request; 1 disables packing
+LLM_BATCH_MAX_POSTS = int(os.getenv("LLM_BATCH_MAX_POSTS", "8"))
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000"))
+# Posts fetched, scored and committed together; bounds memory and lost work on a crash
+SCORING_CHUNK_SIZE = int(os.getenv("SCORING_CHUNK_SIZE", "500"))
+# Ratings written per INSERT/UPDATE round trip in the persist stage
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "200"))
+# Write a cProfile dump per scoring run into this directory (unset disables profiling)
+SCORING_PROFILE_DIR = os.getenv("SCORING_PROFILE_DIR")
+
+# Embedding cache: in-process LRU plus a durable tier ("sqlite", "redis" or "none")
+EMBEDDING_CACHE_MAX_ITEMS = int(os.getenv("EMBEDDING_CACHE_MAX_ITEMS", "50000"))
+EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "sqlite")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_DURABLE_MAX_ITEMS = int(os.getenv("EMBEDDING_CACHE_DURABLE_MAX_ITEMS", "1000000"))
+
+# Bounds of the "redis" durable tier per cache; it shares Redis with the Celery broker
+REDIS_CACHE_MAX_ITEMS = int(os.getenv("REDIS_CACHE_MAX_ITEMS", "20000"))
+REDIS_CACHE_TTL_SECONDS = int(os.getenv("REDIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# LLM rating cache, keyed on content hash, model and prompt version
+RATING_CACHE_MAX_ITEMS = int(os.getenv("RATING_CACHE_MAX_ITEMS", "10000"))
+RATING_CACHE_BACKEND = os.getenv("RATING_CACHE_BACKEND", "sqlite")
+RATING_CACHE_PATH = os.getenv("RATING_CACHE_PATH", ".cache/ratings.sqlite3")
+RATING_CACHE_DURABLE_MAX_ITEMS = int(os.getenv("RATING_CACHE_DURABLE_MAX_ITEMS", "200000"))
+RATING_CACHE_TTL_SECONDS = int(os.getenv("RATING_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# pgvector HNSW index on AIPostRating.embedding (build and search parameters)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+# Where duplicates are looked up: "memory" (DeduplicationIndex) or "pgvector"
+DEDUP_BACKEND = os.getenv("DEDUP_BACKEND", "memory")
+# Representation the pgvector index searches: "none" (float32), "halfvec" or "binary";
+# candidates found with it are reranked on the full vectors
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "none")
+QUANTIZED_RERANK_CANDIDATES = int(os.getenv("QUANTIZED_RERANK_CANDIDATES", "40"))
+
+# Lexical near-duplicate prefilter run before embedding (MinHash LSH over word shingles,
+# see LexicalIndex); changing the shingle size or permutations invalidates stored signatures
+LEXICAL_DEDUP = os.getenv("LEXICAL_DEDUP", "true").lower() == "true"
+LEXICAL_SHINGLE_SIZE = int(os.getenv("LEXICAL_SHINGLE_SIZE", "3"))
+LEXICAL_NUM_PERM = int(os.getenv("LEXICAL_NUM_PERM", "64"))
+LEXICAL_BANDS = int(os.getenv("LEXICAL_BANDS", "16"))
+LEXICAL_SIMILARITY_THRESHOLD = float(os.getenv("LEXICAL_SIMILARITY_THRESHOLD", "0.9"))
+
+# Embedding model of ratings stored before the model was recorded (the only model used then);
+# set it empty to leave those vectors out of duplicate checks until an incremental run re-embeds them
+LEGACY_EMBEDDING_MODEL = os.getenv("LEGACY_EMBEDDING_MODEL", "nomic-embed-text") or None
+
+# Where scoring runs: "inprocess" (background task in the API) or "celery" (REDIS_BROKER workers)
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "inprocess")
+# Number of worker tasks queued per trigger in celery mode
+SCORING_WORKER_FANOUT = int(os.getenv("SCORING_WORKER_FANOUT", "4"))
+# How often the API checks on the celery tasks of a run
+SCORING_POLL_SECONDS = float(os.getenv("SCORING_POLL_SECONDS", "5"))
+# How long a worker's claim on a post lasts before another worker may retry it
+SCORING_LEASE_SECONDS = int(os.getenv("SCORING_LEASE_SECONDS", "900"))
+
+# Shared keep-alive HTTP clients (see app/utils/clients.py); pool sizes default to the stage concurrency
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", str(LLM_CONCURRENCY)))
+EMBED_HTTP_MAX_CONNECTIONS = int(os.getenv("EMBED_HTTP_MAX_CONNECTIONS", str(EMBED_CONCURRENCY)))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+EMBED_TIMEOUT_SECONDS = float(os.getenv("EMBED_TIMEOUT_SECONDS", "60"))
+
+# Database connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections before server/proxy idle timeouts drop them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Call governor for LLM and embedding requests (see app/utils/governor.py)
+MODEL_CALL_MAX_RETRIES = int(os.getenv("MODEL_CALL_MAX_RETRIES", "5"))
+MODEL_CALL_BACKOFF_BASE = float(os.getenv("MODEL_CALL_BACKOFF_BASE", "0.5"))
+MODEL_CALL_BACKOFF_MAX = float(os.getenv("MODEL_CALL_BACKOFF_MAX", "30"))
+# Requests per second allowed per model, e.g. "gemini-2.0-flash=5,nomic-embed-text=50"; unlisted models are unlimited
+MODEL_RATE_LIMITS = os.getenv("MODEL_RATE_LIMITS", "")
@@ -1,10 +1,39 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, UniqueConstraint, ARRAY
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, UniqueConstraint, ARRAY, Index, LargeBinary, text
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
+from app.config import HNSW_M, HNSW_EF_CONSTRUCTION, EMBEDDING_QUANTIZATION
 
 Base = declarative_base()
 
+EMBEDDING_DIM = 768  # Adjust size to match your embedding model
+
+# HNSW index expression and operator class per EMBEDDING_QUANTIZATION; the
+# quantized variants index a compact copy of the vector computed by Postgres
+EMBEDDING_INDEXES = {
+    "none": ("AIPostRating_embedding_hnsw_idx", "embedding vector_cosine_ops"),
+    "halfvec": (
+        "AIPostRating_embedding_halfvec_idx",
+        f"(embedding::halfvec({EMBEDDING_DIM})) halfvec_cosine_ops",
+    ),
+    "binary": (
+        "AIPostRating_embedding_binary_idx",
+        f"(binary_quantize(embedding)::bit({EMBEDDING_DIM})) bit_hamming_ops",
+    ),
+}
+
+
+def embedding_index(quantization: str = EMBEDDING_QUANTIZATION) -> Index:
+    """Approximate nearest-neighbour index used for cosine similarity lookups."""
+    name, expression = EMBEDDING_INDEXES[quantization]
+    return Index(
+        name,
+        text(expression),
+        postgresql_using="hnsw",
+        postgresql_with={"m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION},
+    )
+
+
 class Post(Base):
     __tablename__ = "Post"
 
@@ -17,6 +46,11 @@ class Post(Base):
     userRating = Column(Integer, default=0)
     aiRatingId = Column(Integer, unique=True)
     internal_id = Column(Integer, unique=True)
+    # Set while a scoring worker holds the post; see app/services/leases.py
+    scoringLeaseUntil = Column(DateTime(timezone=True))
+    scoringLeasedBy = Column(String)
+    # content_hash() of title and content, see app/utils/text.py
+    contentHash = Column(String, index=True)
 
     ai_rating = relationship("AIPostRating", back_populates="post", uselist=False)
 
@@ -38,7 +72,15 @@ class AIPostRating(Base):
     readabilityGunningFog = Column(Float)
     mainTopic = Column(String)
     secondaryTopics = Column(ARRAY(String))
-    embedding = Column(Vector(768))  # Adjust size to match your embedding model
+    embedding = Column(Vector(EMBEDDING_DIM))
+    # What the rating was computed from; compared with the current values to find stale ratings
+    contentHash = Column(String)
+    embeddingModel = Column(String)
+    promptVersion = Column(String)
+    # MinHash signature (uint32 array) for the lexical duplicate prefilter, see LexicalIndex
+    lexicalSignature = Column(LargeBinary)
     createdAt = Column(DateTime(timezone=True), server_default=func.now())
 
     post = relationship("Post", back_populates="ai_rating")
+
+    __table_args__ = (embedding_index(),)
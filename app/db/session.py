@@ -1,11 +1,51 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
+from app.config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
 
-load_dotenv()
+# engine and AsyncSessionLocal are created on first access (see __getattr__),
+# so importing this module does not load the database driver
+_engine = None
+_session_factory = None
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_async_engine(DATABASE_URL, future=True, echo=False)
-AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+def get_engine():
+    """Return the shared async engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _engine = create_async_engine(
+            DATABASE_URL,
+            future=True,
+            echo=False,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            # Drop connections the server closed while they sat idle in the pool
+            pool_pre_ping=True,
+        )
+    return _engine
+
+
+def get_session_factory():
+    """Return the shared AsyncSession factory, creating it on first use."""
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.orm import sessionmaker
+
+        _session_factory = sessionmaker(get_engine(), expire_on_commit=False, class_=AsyncSession)
+    return _session_factory
+
+
+async def dispose_engine():
+    """Close pooled connections, if the engine was ever created."""
+    if _engine is not None:
+        await _engine.dispose()
+
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    if name == "AsyncSessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
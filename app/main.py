@@ -1,12 +1,33 @@
 # app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from app.scheduler import router as scheduler_router
+from app.db.session import dispose_engine
+from app.utils.clients import close_clients
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients and the DB engine are created on first use; close whatever was opened
+    try:
+        yield
+    finally:
+        await close_clients()
+        await dispose_engine()
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 async def read_root():
     return {"Hello": "World"}
 
+@app.get("/metrics")
+async def metrics():
+    # Scoring metrics for Prometheus; imported here to keep startup light
+    from app.services.metrics import render_metrics
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Register the scheduler routes
-app.include_router(scheduler_router)
\ No newline at end of file
+app.include_router(scheduler_router)
@@ -1,16 +1,155 @@
 # app/scheduler.py
-from fastapi import APIRouter
-from app.services.scorer import score_new_posts
-from app.db.session import AsyncSessionLocal
+from fastapi import APIRouter, HTTPException
+from app.services.jobs import ScoringJob, scoring_jobs
+from app.config import SCORING_BACKEND, SCORING_POLL_SECONDS
+from typing import Literal
 import asyncio
+import functools
 
 router = APIRouter()
 
-@router.post("/trigger-scoring")
-async def trigger_scoring():
-    async def background_task():
+
+ScoringMode = Literal["new", "incremental"]
+
+
+async def _run_scoring(job: ScoringJob, mode: ScoringMode = "new", lock=None):
+    # Imported here so the API starts without loading the scoring stack
+    from app.db.session import AsyncSessionLocal
+    from app.services.leases import release_scoring_run_lock
+    from app.services.rescoring import plan_rescoring
+    from app.services.scorer import count_unrated_posts, score_new_posts
+
+    try:
         async with AsyncSessionLocal() as session:
-            await score_new_posts(session)
+            if mode == "incremental":
+                # score_new_posts refreshes the hashes itself; edits it finds are not in the total
+                job.total = (await plan_rescoring(session, refresh_hashes=False))["posts"]
+            else:
+                job.total = await count_unrated_posts(session)
+            await score_new_posts(session, stats=job.stats, mode=mode)
+    finally:
+        if lock is not None:
+            await release_scoring_run_lock(lock)
+
+
+async def _count_remaining(mode: ScoringMode) -> int:
+    from app.db.session import AsyncSessionLocal
+    from app.services.rescoring import count_stale_posts
+    from app.services.scorer import count_unrated_posts
+
+    async with AsyncSessionLocal() as session:
+        if mode == "incremental":
+            return await count_stale_posts(session)
+        return await count_unrated_posts(session)
+
+
+async def _wait_for(result, on_poll=None):
+    # Celery result lookups block on the backend
+    while not await asyncio.to_thread(result.ready):
+        await asyncio.sleep(SCORING_POLL_SECONDS)
+        if on_poll is not None:
+            await on_poll()
+
+
+async def _run_celery_scoring(job: ScoringJob, mode: ScoringMode = "new", lock=None):
+    from app.services.leases import release_scoring_run_lock
+    from app.worker import dispatch_scoring, refresh_content_hashes_task
+
+    async def update_remaining():
+        # Workers report their counters only when done; until then the database tells
+        job.remaining = await _count_remaining(mode)
+
+    try:
+        if mode == "incremental":
+            # Once on a worker rather than in every worker task (or the request)
+            refresh = await asyncio.to_thread(refresh_content_hashes_task.delay)
+            await _wait_for(refresh)
+            # Re-raises the task's error, failing the job
+            await asyncio.to_thread(refresh.get)
+        job.total = await _count_remaining(mode)
+        result = await asyncio.to_thread(dispatch_scoring, mode=mode)
+        job.group_id = result.id
+        # The job lasts as long as the tasks, so later triggers join it
+        await _wait_for(result, update_remaining)
+
+        outcomes = await asyncio.to_thread(result.get, propagate=False)
+        job.remaining = None
+        failed = 0
+        for outcome in outcomes:
+            if isinstance(outcome, dict):
+                for name, value in outcome.items():
+                    setattr(job.stats, name, getattr(job.stats, name) + value)
+            else:
+                failed += 1
+        if failed:
+            raise RuntimeError(f"{failed} of {len(outcomes)} scoring tasks failed")
+    finally:
+        if lock is not None:
+            await release_scoring_run_lock(lock)
+
+
+# Serializes triggers of this process, so one waiting for the run lock
+# cannot be refused by the trigger that is about to start a job here
+_trigger_lock = asyncio.Lock()
+
+
+@router.post("/trigger-scoring")
+async def trigger_scoring(mode: ScoringMode = "new"):
+    """
+    Start scoring. mode="new" scores unrated posts; mode="incremental" also
+    re-scores posts whose text, embedding model or prompt version changed.
+
+    In celery mode the run dispatches worker tasks and is tracked like an
+    in-process run until they have all finished.
+    """
+    async with _trigger_lock:
+        lock = None
+        running = scoring_jobs.current
+        if running is None:
+            # Other replicas may be scoring the same posts; they hold this lock while they do
+            from app.services.leases import try_scoring_run_lock
+            lock = await try_scoring_run_lock()
+            if lock is None:
+                raise HTTPException(status_code=409, detail="A scoring run is in progress on another instance")
+
+        if running is not None:
+            if running.mode != mode:
+                # Joining would silently drop the requested mode
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"A '{running.mode}' scoring run ({running.id}) is in progress; retry once it finishes",
+                )
+            # Joins the in-flight run instead of scoring the same posts twice
+            return {"status": "Scoring already running", "job_id": running.id, "mode": running.mode, "joined": True}
+
+        run = _run_celery_scoring if SCORING_BACKEND == "celery" else _run_scoring
+        job, _ = scoring_jobs.start(functools.partial(run, mode=mode, lock=lock), mode=mode)
+        return {"status": "Scoring started", "job_id": job.id, "mode": job.mode, "joined": False}
+
+
+@router.get("/rescoring-plan")
+async def get_rescoring_plan():
+    """
+    What an incremental run would re-score and roughly what it would cost.
+
+    Read-only: edits made since the last run refreshed the content hashes are
+    not counted yet.
+    """
+    from app.db.session import AsyncSessionLocal
+    from app.services.rescoring import plan_rescoring
+
+    async with AsyncSessionLocal() as session:
+        return await plan_rescoring(session, refresh_hashes=False)
+
+
+@router.get("/scoring-jobs")
+async def list_scoring_jobs():
+    return [job.progress() for job in scoring_jobs.list()]
+
 
-    asyncio.create_task(background_task())
-    return {"status": "Scoring started"}
+@router.get("/scoring-jobs/{job_id}")
+async def get_scoring_job(job_id: str):
+    job = scoring_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scoring job not found")
+    return job.progress()
@@ -1,20 +1,454 @@
 #app/services/deduplicator.py
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import select, func, desc
-from app.db.models import AIPostRating
+from sqlalchemy import Integer, select, func, text, bindparam, and_, or_
+from app.db.models import AIPostRating, Post
+from app.utils.clients import OLLAMA_MODEL
+from app.utils.text import normalize_post_text
+from app.config import (
+    HNSW_EF_SEARCH,
+    EMBEDDING_QUANTIZATION,
+    QUANTIZED_RERANK_CANDIDATES,
+    LEXICAL_SHINGLE_SIZE,
+    LEXICAL_NUM_PERM,
+    LEXICAL_BANDS,
+    LEXICAL_SIMILARITY_THRESHOLD,
+)
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 import logging
+import re
+import threading
+import zlib
 
 logger = logging.getLogger(__name__)
 
 SIMILARITY_THRESHOLD = 0.90  # Configurable threshold
 
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+# Fixed so signatures written by one process can be compared in another
+_MINHASH_SEED = 1
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class DeduplicationIndex:
+    """
+    In-memory cosine similarity index over stored post embeddings.
+
+    Embeddings are kept as pre-normalized rows of one contiguous float32 matrix,
+    so the max cosine similarity for a whole batch is a single matrix multiply
+    instead of one database query per post. Load it once per run with load(),
+    then call check_batch() for each batch of new embeddings. Each post has at
+    most one row: re-embedding a post replaces its row, and a post is never
+    compared with its own row. Only originals belong in the index: stored
+    ratings of duplicates are not loaded, and rows added for posts that end
+    up not being persisted should be dropped again with remove().
+
+    Methods are thread-safe, so queries over a large index can run in
+    asyncio.to_thread; NumPy releases the GIL during the multiply.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self._size = 0
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self._post_ids = np.empty(0, dtype=np.int64)
+        self._row_of = {}  # post id -> row in the matrix
+        self._last_rating_id = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:self._size]
+
+    @classmethod
+    async def load(cls, session, chunk_size: int = 10000) -> "DeduplicationIndex":
+        """
+        Build an index from every stored AIPostRating embedding.
+
+        Args:
+            session: SQLAlchemy async session
+            chunk_size: Rows fetched per round trip while streaming
+
+        Returns:
+            DeduplicationIndex: Index containing all existing embeddings
+        """
+        index = cls()
+        await index.refresh(session, chunk_size)
+        logger.info(f"Loaded {len(index)} embeddings into the deduplication index")
+        return index
+
+    async def refresh(self, session, chunk_size: int = 10000):
+        """
+        Append stored embeddings written since the last load or refresh.
+
+        Long-lived workers call this before each run so the index picks up
+        ratings written by other workers without reloading the whole table.
+        Rows of posts already in the index are replaced. Re-scoring keeps the
+        rating id, so a rating re-embedded by another worker is only picked up
+        on a full load().
+        """
+        stmt = (
+            select(AIPostRating.id, AIPostRating.postId, AIPostRating.embedding)
+            .where(
+                AIPostRating.embedding.is_not(None),
+                AIPostRating.id > self._last_rating_id,
+                # Vectors of another model are not comparable (and may differ in size)
+                AIPostRating.embeddingModel == OLLAMA_MODEL,
+                is_original(),
+            )
+            .order_by(AIPostRating.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await session.stream(stmt)
+        async for rows in result.partitions(chunk_size):
+            self._last_rating_id = rows[-1][0]
+            self.add([row[2] for row in rows], [row[1] for row in rows])
+
+    def _as_matrix(self, embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dim}")
+        return _normalize_rows(matrix)
+
+    def add(self, embeddings, post_ids: Sequence[int]):
+        """
+        Add embeddings to the index, growing the backing matrix geometrically.
+        Posts that already have a row get it overwritten instead.
+        """
+        if len(post_ids) == 0:
+            return
+        with self._lock:
+            self._add(self._as_matrix(embeddings), [int(post_id) for post_id in post_ids])
+
+    def _add(self, rows: np.ndarray, post_ids: List[int]):
+        # Last occurrence wins, as if the rows were added one by one
+        latest = {post_id: i for i, post_id in enumerate(post_ids)}
+        fresh = []
+        for post_id, i in latest.items():
+            row = self._row_of.get(post_id)
+            if row is None:
+                fresh.append(i)
+            else:
+                self._matrix[row] = rows[i]
+        if not fresh:
+            return
+        rows = rows[fresh]
+        post_ids = [post_ids[i] for i in fresh]
+
+        needed = self._size + rows.shape[0]
+        if needed > self._matrix.shape[0]:
+            capacity = max(needed, self._matrix.shape[0] * 2, 1024)
+            matrix = np.empty((capacity, self.dim), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            post_id_buffer = np.empty(capacity, dtype=np.int64)
+            post_id_buffer[:self._size] = self._post_ids[:self._size]
+            self._matrix, self._post_ids = matrix, post_id_buffer
+        self._matrix[self._size:needed] = rows
+        self._post_ids[self._size:needed] = np.asarray(post_ids, dtype=np.int64)
+        self._row_of.update((post_id, self._size + i) for i, post_id in enumerate(post_ids))
+        self._size = needed
+
+    def remove(self, post_ids: Sequence[int]):
+        """Drop the rows of post_ids; a zeroed row never matches anything."""
+        with self._lock:
+            for post_id in post_ids:
+                row = self._row_of.pop(int(post_id), None)
+                if row is not None:
+                    self._matrix[row] = 0.0
+
+    def query(self, embeddings, post_ids: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Max cosine similarity of each embedding against the indexed rows and
+        against the embeddings that precede it in the same batch.
+
+        Args:
+            embeddings: Embeddings to check
+            post_ids: Post of each embedding; its own row (from an earlier
+                rating) is left out of the comparison
+
+        Returns:
+            np.ndarray: One similarity in [0, 1] per input embedding
+        """
+        with self._lock:
+            return self._query(self._as_matrix(embeddings), post_ids)
+
+    def _query(self, batch: np.ndarray, post_ids: Optional[Sequence[int]]) -> np.ndarray:
+        best = np.zeros(batch.shape[0], dtype=np.float32)
+        if self._size:
+            similarities = batch @ self.matrix.T
+            if post_ids is not None:
+                own = [(i, self._row_of[int(post_id)]) for i, post_id in enumerate(post_ids) if int(post_id) in self._row_of]
+                if own:
+                    queries, rows = zip(*own)
+                    similarities[list(queries), list(rows)] = -np.inf
+            best = np.maximum(best, similarities.max(axis=1))
+        if batch.shape[0] > 1:
+            # Only compare against earlier posts so the first copy stays the original
+            within = batch @ batch.T
+            within[np.triu_indices(batch.shape[0])] = -np.inf
+            best = np.maximum(best, within.max(axis=1))
+        return np.clip(best, 0.0, 1.0)
+
+    def check_batch(self, embeddings, post_ids: Sequence[int]) -> np.ndarray:
+        """
+        Query a batch and then add it, so later batches are checked against it.
+
+        Returns:
+            np.ndarray: One similarity in [0, 1] per input embedding
+        """
+        with self._lock:
+            similarities = self.query(embeddings, post_ids)
+            self.add(embeddings, post_ids)
+        return similarities
+
+
+def is_original():
+    """SQL condition for ratings that may serve as the original in duplicate checks."""
+    # A stored duplicate could otherwise make its own original look like a copy
+    return or_(AIPostRating.similarityScore == None, AIPostRating.similarityScore < SIMILARITY_THRESHOLD)
+
+
+class LexicalIndex:
+    """
+    MinHash LSH index that finds near-identical posts without any model call.
+
+    Each post is reduced to the set of its word shingles (LEXICAL_SHINGLE_SIZE
+    consecutive words, case-folded) and a MinHash signature of num_perm uint32
+    values, where the fraction of equal values estimates the Jaccard
+    similarity of two shingle sets. Signatures are split into bands, and posts
+    sharing any band hash are candidates; candidates are then compared on the
+    whole signature against threshold. With the defaults (64 permutations, 16
+    bands of 4) a pair at Jaccard 0.9 becomes a candidate with probability
+    above 0.9999, while pairs below 0.3 rarely do.
+
+    Band hashes live in one sorted array per band, searched with
+    np.searchsorted, plus a small unsorted tail for recent additions that is
+    merged in once it grows past an eighth of the sorted part. Replacing or
+    removing a post's signature leaves the old row in place but ignored.
+    """
+
+    _MIN_TAIL = 4096
+
+    def __init__(
+        self,
+        num_perm: int = LEXICAL_NUM_PERM,
+        bands: int = LEXICAL_BANDS,
+        shingle_size: int = LEXICAL_SHINGLE_SIZE,
+        threshold: float = LEXICAL_SIMILARITY_THRESHOLD,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        rng = np.random.RandomState(_MINHASH_SEED)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._band_multipliers = rng.randint(1, 1 << 63, size=num_perm // bands, dtype=np.uint64) | np.uint64(1)
+
+        self._size = 0
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._keys = np.empty((0, bands), dtype=np.uint64)
+        self._post_ids = np.empty(0, dtype=np.int64)
+        self._row_of = {}  # post id -> its current row
+        self._sorted_rows = 0  # rows [0, _sorted_rows) are in the sorted arrays
+        self._sorted_keys = np.empty((bands, 0), dtype=np.uint64)
+        self._sorted_order = np.empty((bands, 0), dtype=np.int64)
+        self._last_rating_id = 0
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def signature(self, title: str, content: str) -> Optional[np.ndarray]:
+        """MinHash signature of a post, or None if it has no words."""
+        words = _WORD.findall(normalize_post_text(title, content).lower())
+        if not words:
+            return None
+        k = min(self.shingle_size, len(words))
+        shingles = {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        # a, b and x are below 2**32, so a * x + b cannot overflow uint64
+        hashed = (np.outer(self._a, x) + self._b[:, None]) % _MERSENNE_PRIME
+        return (hashed.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        rows = signatures.reshape(signatures.shape[0], self.bands, -1).astype(np.uint64)
+        # Wrapping uint64 arithmetic is the hash
+        return (rows * self._band_multipliers).sum(axis=2, dtype=np.uint64)
+
+    @classmethod
+    async def load(cls, session, chunk_size: int = 10000) -> "LexicalIndex":
+        """Build an index from every stored AIPostRating.lexicalSignature."""
+        index = cls()
+        await index.refresh(session, chunk_size)
+        logger.info(f"Loaded {len(index)} signatures into the lexical index")
+        return index
+
+    async def refresh(self, session, chunk_size: int = 10000):
+        """Add signatures stored since the last load or refresh, as DeduplicationIndex.refresh."""
+        stmt = (
+            select(AIPostRating.id, AIPostRating.postId, AIPostRating.lexicalSignature)
+            .where(AIPostRating.lexicalSignature.is_not(None), AIPostRating.id > self._last_rating_id, is_original())
+            .order_by(AIPostRating.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await session.stream(stmt)
+        async for rows in result.partitions(chunk_size):
+            self._last_rating_id = rows[-1][0]
+            signatures = [np.frombuffer(row[2], dtype=np.uint32) for row in rows]
+            # Written with other settings; those posts get a new signature when re-scored
+            keep = [i for i, signature in enumerate(signatures) if signature.shape[0] == self.num_perm]
+            if keep:
+                self.add(np.stack([signatures[i] for i in keep]), [rows[i][1] for i in keep])
+
+    def add(self, signatures, post_ids: Sequence[int]):
+        """Add signatures (one row per post); a post added again replaces its earlier row."""
+        if len(post_ids) == 0:
+            return
+        signatures = np.asarray(signatures, dtype=np.uint32).reshape(len(post_ids), self.num_perm)
+        needed = self._size + signatures.shape[0]
+        if needed > self._signatures.shape[0]:
+            capacity = max(needed, self._signatures.shape[0] * 2, 1024)
+            self._signatures = self._grow(self._signatures, capacity)
+            self._keys = self._grow(self._keys, capacity)
+            self._post_ids = self._grow(self._post_ids, capacity)
+        self._signatures[self._size:needed] = signatures
+        self._keys[self._size:needed] = self._band_keys(signatures)
+        self._post_ids[self._size:needed] = np.asarray(post_ids, dtype=np.int64)
+        self._row_of.update((int(post_id), self._size + i) for i, post_id in enumerate(post_ids))
+        self._size = needed
+        if self._size - self._sorted_rows > max(self._MIN_TAIL, self._sorted_rows // 8):
+            self._merge_tail()
+
+    def remove(self, post_ids: Sequence[int]):
+        """Stop matching against these posts; their rows stay but are skipped."""
+        for post_id in post_ids:
+            self._row_of.pop(int(post_id), None)
+
+    def _grow(self, array: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:self._size] = array[:self._size]
+        return grown
+
+    def _merge_tail(self):
+        keys = self._keys[:self._size].T
+        self._sorted_order = np.argsort(keys, axis=1, kind="stable")
+        self._sorted_keys = np.take_along_axis(keys, self._sorted_order, axis=1)
+        self._sorted_rows = self._size
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        found = []
+        if self._sorted_rows:
+            lower = [np.searchsorted(self._sorted_keys[b], keys[b], side="left") for b in range(self.bands)]
+            upper = [np.searchsorted(self._sorted_keys[b], keys[b], side="right") for b in range(self.bands)]
+            found.extend(self._sorted_order[b, lower[b]:upper[b]] for b in range(self.bands) if upper[b] > lower[b])
+        if self._size > self._sorted_rows:
+            tail = self._keys[self._sorted_rows:self._size]
+            found.append(np.flatnonzero((tail == keys).any(axis=1)) + self._sorted_rows)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, signature: np.ndarray, post_id: Optional[int] = None) -> Tuple[Optional[int], float]:
+        """
+        Most similar indexed post by estimated Jaccard similarity.
+
+        Args:
+            signature: Signature from signature()
+            post_id: Post the signature belongs to; its own row is skipped
+
+        Returns:
+            tuple: (postId, similarity), (None, 0.0) when no candidate shares a band
+        """
+        rows = self._candidates(self._band_keys(signature.reshape(1, -1))[0])
+        if rows.size == 0:
+            return None, 0.0
+        owners = self._post_ids[rows]
+        live = np.array(
+            [self._row_of.get(int(owner)) == row and owner != post_id for owner, row in zip(owners, rows)],
+            dtype=bool,
+        )
+        rows, owners = rows[live], owners[live]
+        if rows.size == 0:
+            return None, 0.0
+        similarities = (self._signatures[rows] == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        return int(owners[best]), float(similarities[best])
+
+    def check_batch(self, signatures: Sequence[Optional[np.ndarray]], post_ids: Sequence[int]) -> List[Tuple[Optional[int], float]]:
+        """
+        Query and add signatures one by one, so a post is also compared with
+        the posts before it in the batch and the first copy stays the original.
+        Only posts below threshold are added; a duplicate never becomes an
+        original. Posts without a signature are reported as (None, 0.0).
+        """
+        matches = []
+        for signature, post_id in zip(signatures, post_ids):
+            if signature is None:
+                matches.append((None, 0.0))
+                continue
+            match = self.query(signature, post_id)
+            if match[1] < self.threshold:
+                self.add(signature.reshape(1, -1), [post_id])
+            matches.append(match)
+        return matches
+
+
+async def find_exact_duplicates(session, hashes: Dict[int, str]) -> Dict[int, int]:
+    """
+    Match posts to an already rated post with the same content hash.
+
+    Uses the index on Post.contentHash, so copies of posts rated by any worker
+    or earlier run are found without loading anything into memory. Only posts
+    rated as originals are matched. Posts in hashes are never matched with
+    each other; LexicalIndex does that.
+
+    Args:
+        session: SQLAlchemy async session
+        hashes: content_hash() by post id
+
+    Returns:
+        dict: Original post id by duplicate post id, for posts that have one
+    """
+    if not hashes:
+        return {}
+    stmt = (
+        select(Post.contentHash, func.min(Post.id))
+        .join(AIPostRating, AIPostRating.postId == Post.id)
+        .where(Post.contentHash.in_(set(hashes.values())), Post.id.not_in(list(hashes)), is_original())
+        .group_by(Post.contentHash)
+    )
+    originals = dict((await session.execute(stmt)).all())
+    return {post_id: originals[digest] for post_id, digest in hashes.items() if digest in originals}
+
+
+def _comparable_embedding():
+    # Vectors from another model live in a different space
+    return and_(AIPostRating.embedding.is_not(None), AIPostRating.embeddingModel == OLLAMA_MODEL)
+
+
 async def compute_similarity_score(session, new_embedding):
     """
-    Compute the maximum similarity between a new embedding and existing embeddings.
+    Compute the maximum similarity between a new embedding and existing embeddings
+    from the current OLLAMA_MODEL.
     """
     # Check if we have any existing ratings with embeddings
-    check_stmt = select(AIPostRating).where(AIPostRating.embedding.is_not(None)).limit(1)
+    check_stmt = select(AIPostRating.id).where(_comparable_embedding()).limit(1)
     check_result = await session.execute(check_stmt)
     has_embeddings = check_result.scalar_one_or_none() is not None
     
@@ -33,16 +467,15 @@ async def compute_similarity_score(session, new_embedding):
         return 0.0
     
     try:
-        # Convert the embedding to a Vector for proper comparison
-        vector_embedding = Vector(new_embedding)
-        
-        # Use pgvector's built-in operator for cosine distance
+        await set_ef_search(session)
+
+        # Use pgvector's built-in operator for cosine distance; ordering by the
+        # distance itself (not 1 - distance) lets the HNSW index serve the query
+        distance = AIPostRating.embedding.cosine_distance(new_embedding)
         stmt = (
-            select(
-                (1 - (AIPostRating.embedding.op("<=>") (vector_embedding))).label("similarity")
-            )
-            .where(AIPostRating.embedding.is_not(None))
-            .order_by(desc("similarity"))
+            select((1 - distance).label("similarity"))
+            .where(_comparable_embedding())
+            .order_by(distance)
             .limit(1)
         )
         
@@ -66,7 +499,8 @@ async def compute_similarity_score(session, new_embedding):
 # Additional helper function that might be useful
 async def get_most_similar_post(session, new_embedding):
     """
-    Find the most similar post to the given embedding.
+    Find the most similar post to the given embedding, among posts embedded
+    with the current OLLAMA_MODEL.
     
     Args:
         session: SQLAlchemy async session
@@ -79,16 +513,14 @@ async def get_most_similar_post(session, new_embedding):
         new_embedding = new_embedding.tolist()
     
     try:
-        vector_embedding = Vector(new_embedding)
         logger.debug(f"Embedding being used for similarity computation: {new_embedding}")
-        
+        await set_ef_search(session)
+
+        distance = AIPostRating.embedding.cosine_distance(new_embedding)
         stmt = (
-            select(
-                AIPostRating,
-                (1 - (AIPostRating.embedding.op("<=>") (vector_embedding))).label("similarity")
-            )
-            .where(AIPostRating.embedding.is_not(None))
-            .order_by(desc("similarity"))
+            select(AIPostRating, (1 - distance).label("similarity"))
+            .where(_comparable_embedding())
+            .order_by(distance)
             .limit(1)
         )
         
@@ -102,4 +534,104 @@ async def get_most_similar_post(session, new_embedding):
         
     except Exception as e:
         logger.error(f"Error finding similar post: {str(e)}", exc_info=True)
-        return None, 0.0
\ No newline at end of file
+        return None, 0.0
+
+
+async def set_ef_search(session, ef_search: int = HNSW_EF_SEARCH):
+    """
+    Set the HNSW candidate list size for the current transaction.
+
+    Higher values trade query latency for recall; see
+    benchmarks/bench_vector_index.py for measurements.
+    """
+    await session.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+
+def _candidate_order(quantization: str, dim: int) -> str:
+    """ORDER BY expression matching the HNSW index for quantization (see app/db/models.py)."""
+    if quantization == "halfvec":
+        return f"r.embedding::halfvec({dim}) <=> q.embedding::halfvec({dim})"
+    if quantization == "binary":
+        return f"binary_quantize(r.embedding)::bit({dim}) <~> binary_quantize(q.embedding)::bit({dim})"
+    return "r.embedding <=> q.embedding"
+
+
+async def nearest_neighbours(
+    session,
+    embeddings,
+    ef_search: int = HNSW_EF_SEARCH,
+    quantization: str = EMBEDDING_QUANTIZATION,
+    candidates: int = QUANTIZED_RERANK_CANDIDATES,
+    post_ids: Optional[Sequence[int]] = None,
+) -> List[Tuple[Optional[int], float]]:
+    """
+    Find the most similar stored post for every embedding in one query.
+
+    Only ratings embedded with the current OLLAMA_MODEL are compared; the rest
+    are re-embedded by an incremental run.
+
+    The new embeddings are sent as a VALUES list and each one is matched with a
+    LATERAL index scan, replacing N separate round trips with one. With a
+    quantized index the scan returns the closest candidates by halfvec or
+    binary (Hamming) distance, which are then reranked by exact cosine distance
+    on the stored float32 vectors, so the similarity compared against
+    SIMILARITY_THRESHOLD is always full precision.
+
+    Args:
+        session: SQLAlchemy async session
+        embeddings: Sequence of embedding vectors
+        ef_search: HNSW search breadth for this query
+        quantization: "none", "halfvec" or "binary"; must match the index in use
+        candidates: Candidates reranked per embedding with a quantized index
+        post_ids: Post of each embedding; its own stored rating is skipped
+
+    Returns:
+        list: (postId, similarity) per embedding, (None, 0.0) when nothing matches
+    """
+    embeddings = [e.tolist() if isinstance(e, np.ndarray) else list(e) for e in embeddings]
+    if not embeddings:
+        return []
+
+    dim = len(embeddings[0])
+    if post_ids is None:
+        post_ids = [None] * len(embeddings)
+    values = ", ".join(
+        f"({i}, CAST(:p{i} AS integer), CAST(:q{i} AS vector({dim})))" for i in range(len(embeddings))
+    )
+    if quantization == "none":
+        candidates = 1
+    else:
+        # HNSW returns at most ef_search rows per scan
+        ef_search = max(ef_search, candidates)
+    stmt = text(f"""
+        SELECT q.idx, nn."postId", 1 - nn.distance AS similarity
+        FROM (VALUES {values}) AS q(idx, post_id, embedding)
+        CROSS JOIN LATERAL (
+            SELECT c."postId", c.embedding <=> q.embedding AS distance
+            FROM (
+                SELECT r."postId", r.embedding
+                FROM "AIPostRating" r
+                WHERE r.embedding IS NOT NULL AND r."postId" IS DISTINCT FROM q.post_id
+                  AND r."embeddingModel" = :embedding_model
+                  AND (r."similarityScore" IS NULL OR r."similarityScore" < :threshold)
+                ORDER BY {_candidate_order(quantization, dim)}
+                LIMIT {int(candidates)}
+            ) AS c
+            ORDER BY distance
+            LIMIT 1
+        ) AS nn
+    """).bindparams(*[
+        bindparam(f"q{i}", value=embedding, type_=Vector(dim))
+        for i, embedding in enumerate(embeddings)
+    ], *[
+        bindparam(f"p{i}", value=post_id, type_=Integer)
+        for i, post_id in enumerate(post_ids)
+    ], bindparam("threshold", value=SIMILARITY_THRESHOLD), bindparam("embedding_model", value=OLLAMA_MODEL))
+
+    await set_ef_search(session, ef_search)
+    result = await session.execute(stmt)
+
+    neighbours = [(None, 0.0)] * len(embeddings)
+    for idx, post_id, similarity in result:
+        neighbours[idx] = (post_id, max(0.0, min(float(similarity), 1.0)))
+    return neighbours
@@ -0,0 +1,138 @@
+#app/services/jobs.py
+from app.services.stats import ScoringStats
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Tuple
+import asyncio
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScoringJob:
+    """A single scoring run and its live counters."""
+    id: str
+    started_at: float
+    status: str = "running"  # running | completed | failed
+    finished_at: Optional[float] = None
+    total: Optional[int] = None  # unrated posts when the run started
+    remaining: Optional[int] = None  # posts left, while stats are not reported live (celery mode)
+    error: Optional[str] = None
+    stats: ScoringStats = field(default_factory=ScoringStats)
+    mode: str = "new"  # see scorer.SCORING_MODES
+    group_id: Optional[str] = None  # celery group of the worker tasks, in celery mode
+
+    @property
+    def running(self) -> bool:
+        return self.status == "running"
+
+    def progress(self) -> dict:
+        """
+        Snapshot of the job for the progress API.
+
+        Throughput counts every post the run has finished with (scored,
+        duplicate or failed); ETA extrapolates it over the remaining posts.
+        Celery workers report their counters only when they finish, so until
+        then the posts done are total minus remaining.
+        """
+        done = self.stats.processed + self.stats.duplicates + self.stats.errors
+        if self.remaining is not None and self.total is not None:
+            done = max(self.total - self.remaining, 0)
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        throughput = done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.running and self.total is not None and throughput > 0:
+            eta = max(self.total - done, 0) / throughput
+        return {
+            "job_id": self.id,
+            "mode": self.mode,
+            "group_id": self.group_id,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "total": self.total,
+            "remaining": self.remaining,
+            "processed": self.stats.processed,
+            "duplicates": self.stats.duplicates,
+            "errors": self.stats.errors,
+            "elapsed_seconds": elapsed,
+            "throughput_per_second": throughput,
+            "eta_seconds": eta,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    """
+    Tracks scoring runs in this process and allows only one at a time.
+
+    start() is synchronous, so two triggers handled by the same event loop can
+    never both see "no job running" and start duplicate runs. Across API
+    replicas the trigger endpoint also takes a Postgres advisory lock, see
+    leases.try_scoring_run_lock(). In celery mode a job dispatches the worker
+    tasks and lasts until they have all finished.
+    """
+
+    def __init__(self, history: int = 20):
+        self.history = history
+        self._jobs = OrderedDict()
+        self._current: Optional[ScoringJob] = None
+        self._tasks = set()
+
+    @property
+    def current(self) -> Optional[ScoringJob]:
+        if self._current is not None and self._current.running:
+            return self._current
+        return None
+
+    def get(self, job_id: str) -> Optional[ScoringJob]:
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(reversed(self._jobs.values()))
+
+    def start(self, run: Callable[[ScoringJob], Awaitable[None]], mode: str = "new") -> Tuple[ScoringJob, bool]:
+        """
+        Start run as a background task unless a job is already in flight.
+
+        Args:
+            run: Coroutine function performing the work; it updates job.stats
+                and may set job.total
+            mode: Scoring mode recorded on the job; callers compare it with the
+                in-flight job's mode before joining it
+
+        Returns:
+            tuple: (job, started) where started is False if an in-flight job
+                was joined instead
+        """
+        if self.current is not None:
+            return self.current, False
+
+        job = ScoringJob(id=uuid.uuid4().hex, started_at=time.time(), mode=mode)
+        self._current = job
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            self._jobs.popitem(last=False)
+
+        task = asyncio.create_task(self._run(job, run))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job, True
+
+    async def _run(self, job: ScoringJob, run: Callable[[ScoringJob], Awaitable[None]]):
+        try:
+            await run(job)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Scoring job {job.id} failed: {str(e)}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+
+scoring_jobs = JobRegistry()
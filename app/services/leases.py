@@ -0,0 +1,108 @@
+#app/services/leases.py
+from app.db.models import Post
+from app.db.session import get_engine
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy import Select, select, update, or_, func, text
+from datetime import timedelta
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# pg advisory lock key held by the in-process scoring run of any API replica
+SCORING_RUN_LOCK_KEY = 0x5C0_0001
+
+
+def lease_available():
+    """SQL condition matching posts that no worker currently holds a lease on."""
+    return or_(Post.scoringLeaseUntil == None, Post.scoringLeaseUntil < func.now())
+
+
+async def claim_unrated_posts(
+    session: AsyncSession, worker_id: str, limit: int, lease_seconds: int, candidates: Optional[Select] = None
+) -> List[Post]:
+    """
+    Lease up to limit unrated published posts to worker_id and return them.
+
+    Candidate rows are locked with FOR UPDATE SKIP LOCKED, so concurrent workers
+    never block on each other and never claim the same post. The lease is
+    committed immediately; it stays valid for lease_seconds, after which the
+    post can be claimed again if it was not rated (e.g. the worker crashed).
+
+    Args:
+        session: SQLAlchemy async session
+        worker_id: Identifier recorded on the leased posts
+        limit: Maximum number of posts to claim
+        lease_seconds: How long the claim is held
+        candidates: SELECT of Post.id to claim from instead of unrated
+            published posts, e.g. rescoring.stale_posts_query(Post.id)
+
+    Returns:
+        List[Post]: Claimed posts in id order, empty when nothing is left
+    """
+    if candidates is None:
+        candidates = select(Post.id).where(Post.aiRatingId == None, Post.published == True)
+    candidates = (
+        candidates
+        .where(lease_available())
+        .order_by(Post.id)
+        .limit(limit)
+        .with_for_update(of=Post, skip_locked=True)
+    )
+    stmt = (
+        update(Post)
+        .where(Post.id.in_(candidates.scalar_subquery()))
+        .values(scoringLeaseUntil=func.now() + timedelta(seconds=lease_seconds), scoringLeasedBy=worker_id)
+        .returning(Post.id)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        post_ids = (await session.execute(stmt)).scalars().all()
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Failed to claim posts for worker {worker_id}: {str(e)}", exc_info=True)
+        raise
+
+    if not post_ids:
+        return []
+    result = await session.execute(select(Post).where(Post.id.in_(post_ids)).order_by(Post.id))
+    return result.scalars().all()
+
+
+async def try_scoring_run_lock() -> Optional[AsyncConnection]:
+    """
+    Take the cluster-wide scoring run lock without waiting.
+
+    Single-flight in JobRegistry only covers one process; this Postgres
+    advisory lock makes API replicas share it, whether the run scores in
+    process or dispatches celery tasks. The lock belongs to the
+    returned connection, so it is also released if the process dies.
+
+    Returns:
+        AsyncConnection: Holds the lock until release_scoring_run_lock(), or
+            None when another replica is running
+    """
+    conn = await get_engine().connect()
+    try:
+        locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCORING_RUN_LOCK_KEY})).scalar()
+        await conn.commit()
+    except Exception:
+        await conn.close()
+        raise
+    if not locked:
+        await conn.close()
+        return None
+    return conn
+
+
+async def release_scoring_run_lock(conn: AsyncConnection):
+    try:
+        await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCORING_RUN_LOCK_KEY})
+        await conn.commit()
+    except Exception as e:
+        # A pooled connection must not keep the lock: drop the connection instead
+        logger.warning(f"Failed to release scoring lock, discarding connection: {str(e)}")
+        await conn.invalidate()
+    finally:
+        await conn.close()
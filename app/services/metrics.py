@@ -0,0 +1,98 @@
+#app/services/metrics.py
+from app.services.pipeline import Stage, StageObserver, add_stage_observer
+from app.config import SCORING_PROFILE_DIR
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from contextlib import contextmanager
+from typing import Tuple
+import cProfile
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Spans fast cache hits up to slow multi-post LLM requests
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "scoring_stage_seconds",
+    "Duration of one pipeline handler call (a batch for batched stages)",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+STAGE_ITEMS = Counter("scoring_stage_items_total", "Items handled by a pipeline stage", ["stage", "outcome"])
+QUEUE_DEPTH = Gauge("scoring_queue_depth", "Items waiting in front of a pipeline stage", ["stage"])
+LLM_TOKENS = Counter("scoring_llm_tokens_total", "Tokens reported by the LLM provider", ["model", "kind"])
+LLM_REQUESTS = Counter("scoring_llm_requests_total", "Chat completion requests", ["model", "mode", "outcome"])
+RETRIES = Counter("scoring_retries_total", "Calls repeated after a failure", ["reason"])
+POST_OUTCOMES = Counter("scoring_posts_total", "Posts finished by the scorer", ["outcome"])
+CONCURRENCY_LIMIT = Gauge("scoring_concurrency_limit", "Current AIMD concurrency limit per model", ["model"])
+
+
+class PrometheusStageObserver(StageObserver):
+    """Feeds pipeline timing events into the stage histograms and queue gauges."""
+
+    def batch_started(self, stage: Stage, size: int, queue_depth: int):
+        QUEUE_DEPTH.labels(stage.name).set(queue_depth)
+
+    def batch_finished(self, stage: Stage, size: int, seconds: float, failed: bool):
+        STAGE_SECONDS.labels(stage.name).observe(seconds)
+        STAGE_ITEMS.labels(stage.name, "error" if failed else "ok").inc(size)
+
+
+add_stage_observer(PrometheusStageObserver())
+
+
+def record_llm_response(model: str, mode: str, response):
+    """Count a successful completion and the token usage it reports, if any."""
+    LLM_REQUESTS.labels(model, mode, "ok").inc()
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(model, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(model, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def record_llm_failure(model: str, mode: str):
+    LLM_REQUESTS.labels(model, mode, "error").inc()
+
+
+def record_retry(reason: str, count: int = 1):
+    RETRIES.labels(reason).inc(count)
+
+
+def record_concurrency_limit(model: str, limit: float):
+    CONCURRENCY_LIMIT.labels(model).set(int(limit))
+
+
+def record_post_outcome(outcome: str, count: int = 1):
+    """outcome is one of scored, duplicate or error."""
+    POST_OUTCOMES.labels(outcome).inc(count)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+@contextmanager
+def profile_run(name: str):
+    """
+    Profile the enclosed block with cProfile when SCORING_PROFILE_DIR is set.
+
+    Stats are written to SCORING_PROFILE_DIR/<name>-<unix time>.prof, readable
+    with pstats or snakeviz. Without the setting this does nothing.
+    """
+    if not SCORING_PROFILE_DIR:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(SCORING_PROFILE_DIR, exist_ok=True)
+        path = os.path.join(SCORING_PROFILE_DIR, f"{name}-{int(time.time())}.prof")
+        profiler.dump_stats(path)
+        logger.info(f"Wrote scoring profile to {path}")
@@ -0,0 +1,55 @@
+#app/services/persistence.py
+from app.db.models import AIPostRating, Post
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import Integer, String, column, update, values
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def save_ratings(session: AsyncSession, ratings: List[dict]) -> Dict[int, int]:
+    """
+    Write a batch of ratings and link them to their posts in two statements.
+
+    Ratings are inserted with one multi-row INSERT ... ON CONFLICT ("postId")
+    DO UPDATE ... RETURNING, so saving a post that already has a rating
+    overwrites it instead of failing, and re-running a batch is harmless. The
+    returned ids (and the content hash each rating was computed from) are then
+    written to Post.aiRatingId / Post.contentHash with a single
+    UPDATE ... FROM (VALUES ...). Nothing is committed here.
+
+    Args:
+        session: SQLAlchemy async session
+        ratings: AIPostRating column values, one dict per post; if a post
+            appears more than once the last entry wins
+
+    Returns:
+        Dict[int, int]: Rating id for each post id
+    """
+    rows = list({rating["postId"]: rating for rating in ratings}.values())
+    if not rows:
+        return {}
+
+    # A multi-row VALUES needs the same columns in every row
+    columns = sorted({key for row in rows for key in row})
+    rows = [{name: row.get(name) for name in columns} for row in rows]
+
+    stmt = pg_insert(AIPostRating).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AIPostRating.postId],
+        set_={name: stmt.excluded[name] for name in columns if name != "postId"},
+    ).returning(AIPostRating.postId, AIPostRating.id, AIPostRating.contentHash)
+    returned = (await session.execute(stmt)).all()
+
+    linked = values(
+        column("postId", Integer), column("ratingId", Integer), column("contentHash", String), name="linked"
+    ).data([tuple(row) for row in returned])
+    await session.execute(
+        update(Post)
+        .where(Post.id == linked.c.postId)
+        .values(aiRatingId=linked.c.ratingId, contentHash=linked.c.contentHash)
+        .execution_options(synchronize_session=False)
+    )
+    return {post_id: rating_id for post_id, rating_id, _ in returned}
@@ -0,0 +1,144 @@
+#app/services/pipeline.py
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input; each worker consumes exactly one.
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One step of a staged async pipeline.
+
+    Attributes:
+        name: Stage name used in logs
+        handler: Coroutine called with an item; returns the item for the next
+            stage, or None to drop it. When batch_size > 1 it is called with a
+            list of items and returns a list of results instead.
+        concurrency: Number of workers running this stage in parallel
+        batch_size: Maximum number of queued items handed to one handler call
+    """
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1
+    batch_size: int = 1
+
+
+class StageObserver:
+    """
+    Receives timing events from every run_pipeline call once registered with
+    add_stage_observer(). Override the methods you need.
+    """
+
+    def batch_started(self, stage: Stage, size: int, queue_depth: int):
+        """A worker took size items; queue_depth items are still waiting for the stage."""
+
+    def batch_finished(self, stage: Stage, size: int, seconds: float, failed: bool):
+        """The handler call for size items returned (or raised, if failed) after seconds."""
+
+
+_observers: List[StageObserver] = []
+
+
+def add_stage_observer(observer: StageObserver):
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_stage_observer(observer: StageObserver):
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+async def run_pipeline(
+    items: Iterable[Any],
+    stages: list,
+    on_error: Optional[Callable[[Stage, Any, Exception], None]] = None,
+):
+    """
+    Push items through a chain of stages connected by bounded queues.
+
+    Each stage runs its own pool of workers, so a slow stage (e.g. the LLM call)
+    overlaps with the others instead of serialising the whole run. Failures are
+    reported through on_error and the failing item is dropped. Registered
+    StageObserver instances see every handler call.
+
+    Args:
+        items: Input items for the first stage
+        stages: Ordered list of Stage objects
+        on_error: Callback invoked with (stage, item, exception) on failure
+    """
+    queues = [
+        asyncio.Queue(maxsize=max(1, stage.concurrency) * max(1, stage.batch_size) * 2)
+        for stage in stages
+    ]
+
+    async def worker(index: int, stage: Stage):
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        done = False
+        while not done:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            # Take whatever else is already queued, without waiting for more
+            while len(batch) < stage.batch_size:
+                try:
+                    item = inbox.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            for observer in _observers:
+                observer.batch_started(stage, len(batch), inbox.qsize())
+            began = time.perf_counter()
+            try:
+                if stage.batch_size > 1:
+                    results = await stage.handler(batch)
+                else:
+                    results = [await stage.handler(batch[0])]
+            except Exception as e:
+                for observer in _observers:
+                    observer.batch_finished(stage, len(batch), time.perf_counter() - began, True)
+                for failed in batch:
+                    if on_error:
+                        on_error(stage, failed, e)
+                    else:
+                        logger.error(f"Stage '{stage.name}' failed: {e}", exc_info=True)
+                continue
+            for observer in _observers:
+                observer.batch_finished(stage, len(batch), time.perf_counter() - began, False)
+            if outbox is None:
+                continue
+            for result in results:
+                if result is not None:
+                    await outbox.put(result)
+
+    workers = [
+        [asyncio.create_task(worker(i, stage)) for _ in range(max(1, stage.concurrency))]
+        for i, stage in enumerate(stages)
+    ]
+
+    try:
+        for item in items:
+            await queues[0].put(item)
+
+        # Drain stage by stage so downstream workers only stop once upstream is done
+        for i, stage_workers in enumerate(workers):
+            for _ in stage_workers:
+                await queues[i].put(_DONE)
+            await asyncio.gather(*stage_workers)
+    finally:
+        for stage_workers in workers:
+            for task in stage_workers:
+                task.cancel()
@@ -0,0 +1,208 @@
+#app/services/rescoring.py
+from app.db.models import AIPostRating, Post
+from app.services.leases import lease_available
+from app.utils.clients import OLLAMA_MODEL
+from app.utils.openai_client import BATCH_SYSTEM_PROMPT, PROMPT_VERSION, SYSTEM_PROMPT, estimate_tokens
+from app.utils.text import content_hash
+from app.config import LEGACY_EMBEDDING_MODEL, LLM_BATCH_MAX_POSTS
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, String, and_, column, func, or_, select, update, values
+from typing import AsyncIterator, List, Tuple
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+def content_changed():
+    """Rating exists but was computed from different text than the post has now."""
+    return and_(AIPostRating.id != None, AIPostRating.contentHash.is_distinct_from(Post.contentHash))
+
+
+def embedding_stale():
+    return and_(AIPostRating.id != None, AIPostRating.embeddingModel.is_distinct_from(OLLAMA_MODEL))
+
+
+def prompt_stale():
+    return and_(AIPostRating.id != None, AIPostRating.promptVersion.is_distinct_from(PROMPT_VERSION))
+
+
+def needs_scoring():
+    """
+    SQL condition for published posts whose rating is missing or stale.
+
+    Expects AIPostRating to be outer joined on AIPostRating.postId == Post.id,
+    see stale_posts_query().
+    """
+    return and_(
+        Post.published == True,
+        or_(AIPostRating.id == None, content_changed(), embedding_stale(), prompt_stale()),
+    )
+
+
+def stale_posts_query(*columns):
+    """SELECT columns FROM Post LEFT JOIN AIPostRating WHERE needs_scoring()."""
+    return (
+        select(*columns)
+        .select_from(Post)
+        .outerjoin(AIPostRating, AIPostRating.postId == Post.id)
+        .where(needs_scoring())
+    )
+
+
+async def _write_content_hashes(session: AsyncSession, hashes: List[Tuple[int, str]]):
+    """Set Post.contentHash from (post id, hash) pairs in one UPDATE ... FROM VALUES."""
+    updates = values(column("postId", Integer), column("contentHash", String), name="updates").data(hashes)
+    await session.execute(
+        update(Post)
+        .where(Post.id == updates.c.postId)
+        .values(contentHash=updates.c.contentHash)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def backfill_content_hashes(session: AsyncSession, chunk_size: int = 5000) -> int:
+    """
+    Fill in Post.contentHash where it is missing, published or not.
+
+    Cheaper than refresh_content_hashes() because it only reads posts without
+    a hash, e.g. those inserted before the column existed. Commits per chunk.
+
+    Returns:
+        int: Number of posts that got a hash
+    """
+    filled = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(Post.id, Post.title, Post.content)
+            .where(Post.contentHash == None, Post.id > last_id)
+            .order_by(Post.id)
+            .limit(chunk_size)
+        )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        await _write_content_hashes(session, [(post_id, content_hash(title, content)) for post_id, title, content in rows])
+        await session.commit()
+        filled += len(rows)
+    if filled:
+        logger.info(f"Backfilled content hashes of {filled} posts")
+    return filled
+
+
+async def refresh_content_hashes(session: AsyncSession, chunk_size: int = 5000) -> int:
+    """
+    Bring Post.contentHash up to date with each post's current text.
+
+    Posts may be edited by other services that do not maintain the hash, so
+    this streams every published post and rewrites only the hashes that
+    differ. Ratings written before hashes existed are stamped with their post's
+    hash, on the assumption that the text has not changed since. Their
+    prompt version stays unknown, so they count as stale until re-scored; their
+    embedding model is taken to be LEGACY_EMBEDDING_MODEL, unless that is
+    unset. Commits when done.
+
+    Returns:
+        int: Number of posts whose hash changed
+    """
+    stmt = (
+        select(Post.id, Post.title, Post.content, Post.contentHash)
+        .where(Post.published == True)
+        .order_by(Post.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    changed = []
+    result = await session.stream(stmt)
+    async for rows in result.partitions(chunk_size):
+        for post_id, title, content, stored in rows:
+            current = content_hash(title, content)
+            if current != stored:
+                changed.append((post_id, current))
+
+    for start in range(0, len(changed), chunk_size):
+        await _write_content_hashes(session, changed[start:start + chunk_size])
+
+    await session.execute(
+        update(AIPostRating)
+        .where(AIPostRating.postId == Post.id, AIPostRating.contentHash == None)
+        .values(
+            contentHash=Post.contentHash,
+            embeddingModel=func.coalesce(AIPostRating.embeddingModel, LEGACY_EMBEDDING_MODEL),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    if changed:
+        logger.info(f"Updated content hashes of {len(changed)} posts")
+    return len(changed)
+
+
+async def plan_rescoring(session: AsyncSession, refresh_hashes: bool = True) -> dict:
+    """
+    Estimate the work an incremental scoring run would do, without doing it.
+
+    Categories overlap (an edited post is usually stale for the prompt too);
+    "posts" counts every post once. to_score is an upper bound since posts
+    found to be duplicates skip the LLM.
+
+    Args:
+        session: SQLAlchemy async session
+        refresh_hashes: Run refresh_content_hashes() first so edits are seen
+
+    Returns:
+        dict: Counts, estimated embedding/LLM work and the current versions
+    """
+    if refresh_hashes:
+        await refresh_content_hashes(session)
+
+    unrated = AIPostRating.id == None
+    to_embed = or_(unrated, content_changed(), embedding_stale())
+    to_score = or_(unrated, content_changed(), prompt_stale())
+    text_tokens = (func.length(Post.title) + func.coalesce(func.length(Post.content), 0)) / 4
+    stmt = stale_posts_query(
+        func.count().label("posts"),
+        func.count().filter(unrated).label("unrated"),
+        func.count().filter(content_changed()).label("content_changed"),
+        func.count().filter(embedding_stale()).label("embedding_model_changed"),
+        func.count().filter(prompt_stale()).label("prompt_changed"),
+        func.count().filter(to_embed).label("to_embed"),
+        func.count().filter(to_score).label("to_score"),
+        func.coalesce(func.sum(text_tokens).filter(to_score), 0).label("to_score_tokens"),
+    )
+    row = (await session.execute(stmt)).one()._asdict()
+
+    to_score_tokens = int(row.pop("to_score_tokens"))
+    llm_requests = math.ceil(row["to_score"] / max(1, LLM_BATCH_MAX_POSTS))
+    # Every request repeats the system prompt
+    system_prompt = BATCH_SYSTEM_PROMPT if LLM_BATCH_MAX_POSTS > 1 else SYSTEM_PROMPT
+    return {
+        **row,
+        "estimated_llm_requests": llm_requests,
+        "estimated_llm_prompt_tokens": to_score_tokens + llm_requests * estimate_tokens(system_prompt),
+        "embedding_model": OLLAMA_MODEL,
+        "prompt_version": PROMPT_VERSION,
+    }
+
+
+async def count_stale_posts(session: AsyncSession) -> int:
+    """Number of published posts whose rating is missing or stale."""
+    return (await session.execute(stale_posts_query(func.count()))).scalar_one()
+
+
+async def iter_stale_posts(session: AsyncSession, chunk_size: int, after_id: int = 0) -> AsyncIterator[List[Post]]:
+    """
+    Yield published posts whose rating is missing or stale, in id order.
+
+    Same keyset paging and lease handling as iter_unrated_posts; the scorer
+    decides per post which stages need to run again.
+    """
+    last_id = after_id
+    while True:
+        stmt = stale_posts_query(Post).where(Post.id > last_id, lease_available()).order_by(Post.id).limit(chunk_size)
+        posts = (await session.execute(stmt)).scalars().all()
+        if not posts:
+            return
+        last_id = posts[-1].id
+        yield posts
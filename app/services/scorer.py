@@ -1,121 +1,516 @@
 #app/services/scorer.py
-from app.utils.openai_client import score_post
-from app.utils.embeddings import get_post_embedding
-from app.services.deduplicator import compute_similarity_score
+from app.utils.openai_client import PROMPT_VERSION, rating_cache_stats, score_post, score_posts_batch
+from app.utils.readability import readability_scores
+from app.utils.embeddings import OLLAMA_MODEL, aget_post_embeddings, embedding_cache_stats
+from app.utils.text import content_hash
+from app.services.deduplicator import DeduplicationIndex, LexicalIndex, find_exact_duplicates, nearest_neighbours
+from app.services.leases import claim_unrated_posts, lease_available
+from app.services.pipeline import Stage, run_pipeline
+from app.services.persistence import save_ratings
+from app.services.rescoring import iter_stale_posts, refresh_content_hashes, stale_posts_query
+from app.services.stats import ScoringStats
+from app.services.metrics import profile_run, record_post_outcome
 from app.db.models import AIPostRating, Post
+from app.config import (
+    DEDUP_BACKEND,
+    LEXICAL_DEDUP,
+    EMBED_BATCH_SIZE,
+    EMBED_CONCURRENCY,
+    LLM_BATCH_MAX_POSTS,
+    LLM_CONCURRENCY,
+    PERSIST_BATCH_SIZE,
+    SCORING_CHUNK_SIZE,
+    SCORING_LEASE_SECONDS,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
+import numpy as np
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+import asyncio
 import logging
 
-SIMILARITY_THRESHOLD = 0.90  
+SIMILARITY_THRESHOLD = 0.90
 
-async def score_new_posts(session: AsyncSession):
+# "new" scores unrated posts; "incremental" also redoes stale ratings (see app/services/rescoring.py)
+SCORING_MODES = ("new", "incremental")
+
+# Columns of a rating that come from the LLM, kept as they are when only the embedding is redone
+_LLM_FIELDS = (
+    "rating", "justification", "sentimentAnalysisLabel", "sentimentAnalysisScore", "biasDetectionScore",
+    "biasDetectionDirection", "originalityScore", "mainTopic", "secondaryTopics", "promptVersion",
+)
+
+
+@dataclass
+class _PostWork:
+    """State carried for a single post as it moves through the pipeline."""
+    post: Post
+    embedding: Optional[List[float]] = None
+    similarity: float = 0.0
+    flesch_kincaid: float = 0.0
+    gunning_fog: float = 0.0
+    duplicate: bool = False
+    ai_rating: Optional[dict] = None  # AIPostRating column values
+    content_hash: str = ""
+    previous: Optional[AIPostRating] = None  # Existing rating when re-scoring
+    needs_embedding: bool = True
+    needs_rating: bool = True
+    lexical_signature: Optional[np.ndarray] = None
+    indexed: bool = False  # Embedding added to the dedup index before being persisted
+    lexical_indexed: bool = False  # Signature added to the lexical index before being persisted
+
+
+def _versions(work: _PostWork) -> dict:
+    # What the new rating is computed from, compared later to find stale ratings
+    signature = work.lexical_signature.tobytes() if work.lexical_signature is not None else None
+    return dict(
+        contentHash=work.content_hash,
+        embeddingModel=OLLAMA_MODEL,
+        promptVersion=PROMPT_VERSION,
+        lexicalSignature=signature,
+    )
+
+
+def _duplicate_rating(work: _PostWork) -> dict:
+    return dict(
+        _versions(work),
+        postId=work.post.id,
+        embedding=work.embedding,
+        similarityScore=work.similarity,
+        rating=0,  # Zero rating for duplicates
+        justification="Duplicate content. This post is too similar to existing content.",
+        sentimentAnalysisLabel="Neutral",  # Default values for required fields
+        sentimentAnalysisScore=0.5,
+        biasDetectionScore=0.0,
+        biasDetectionDirection="neutral",
+        originalityScore=0.0,  # Low originality for duplicates
+        readabilityFleschKincaid=work.flesch_kincaid,
+        readabilityGunningFog=work.gunning_fog,
+        mainTopic="duplicate content",
+        secondaryTopics=["duplicate"]
+    )
+
+
+async def iter_unrated_posts(session: AsyncSession, chunk_size: int, after_id: int = 0) -> AsyncIterator[List[Post]]:
     """
-    Process and score all unrated published posts, handling duplicates gracefully.
-    
+    Yield unrated published posts in id order, chunk_size at a time.
+
+    Uses keyset pagination (id > last seen id) rather than OFFSET, so each page
+    is an index range scan and posts that fail to score are not fetched again
+    within the same run. Posts rated by an earlier chunk are skipped naturally,
+    which is what makes an interrupted run resumable. Posts currently leased by
+    a scoring worker are left to that worker.
+
     Args:
         session: SQLAlchemy async session
+        chunk_size: Maximum number of posts per chunk
+        after_id: Only consider posts with a greater id
+    """
+    last_id = after_id
+    while True:
+        stmt = (
+            select(Post)
+            .where(Post.aiRatingId == None, Post.published == True, Post.id > last_id, lease_available())
+            .order_by(Post.id)
+            .limit(chunk_size)
+        )
+        result = await session.execute(stmt)
+        posts = result.scalars().all()
+        if not posts:
+            return
+        last_id = posts[-1].id
+        yield posts
+
+
+async def load_lexical_index(session: AsyncSession) -> Optional[LexicalIndex]:
+    """Lexical prefilter index for a run, or None when LEXICAL_DEDUP is off."""
+    if not LEXICAL_DEDUP:
+        return None
+    return await LexicalIndex.load(session)
+
+
+async def load_dedup_index(session: AsyncSession) -> DeduplicationIndex:
+    """
+    Build the deduplication index for a run.
+
+    With the pgvector backend the index only holds the current chunk's posts
+    (PostScorer starts a new one per chunk) and stored posts are looked up
+    through the HNSW index instead.
+    """
+    if DEDUP_BACKEND == "pgvector":
+        return DeduplicationIndex()
+    return await DeduplicationIndex.load(session)
+
+
+def _rating_from_score(work: _PostWork, rating_data) -> dict:
+    # Merge rating data with embedding, similarity and readability
+    data = rating_data.dict()
+    data.pop("similarityScore", None)
+    return dict(
+        _versions(work),
+        postId=work.post.id,
+        embedding=work.embedding,
+        similarityScore=work.similarity,
+        readabilityFleschKincaid=work.flesch_kincaid,
+        readabilityGunningFog=work.gunning_fog,
+        **data
+    )
+
+
+def _rating_from_previous(work: _PostWork) -> dict:
+    # Text and prompt are unchanged: keep the LLM's answer, refresh everything else
+    return dict(
+        _versions(work),
+        postId=work.post.id,
+        embedding=work.embedding,
+        similarityScore=work.similarity,
+        readabilityFleschKincaid=work.flesch_kincaid,
+        readabilityGunningFog=work.gunning_fog,
+        **{name: getattr(work.previous, name) for name in _LLM_FIELDS}
+    )
+
+
+def _was_duplicate(work: _PostWork) -> bool:
+    return work.previous is not None and (work.previous.similarityScore or 0.0) >= SIMILARITY_THRESHOLD
+
+
+def _plan_work(work: _PostWork):
+    """Decide which stages a post with an existing rating has to go through again."""
+    previous = work.previous
+    if previous is None:
+        return
+    text_changed = previous.contentHash != work.content_hash
+    work.needs_embedding = text_changed or previous.embeddingModel != OLLAMA_MODEL or previous.embedding is None
+    work.needs_rating = text_changed or previous.promptVersion != PROMPT_VERSION
+    if not work.needs_embedding:
+        work.embedding = [float(x) for x in previous.embedding]
+        work.similarity = previous.similarityScore or 0.0
+
+
+class PostScorer:
     """
-    # Get all unrated published posts
-    stmt = select(Post).where(Post.aiRatingId == None, Post.published == True)
-    result = await session.execute(stmt)
-    posts = result.scalars().all()
-    
-    logging.info(f"Found {len(posts)} unrated posts to process")
-    
-    processed_count = 0
-    duplicate_count = 0
-    error_count = 0
-    
-    for post in posts:
+    Scores chunks of posts through a staged pipeline (prefilter -> embed -> dedup -> LLM score -> persist).
+
+    With a LexicalIndex, exact copies of rated posts (same content hash) and
+    near-identical posts (MinHash similarity) are flagged as duplicates first
+    and skip both the embedding and the LLM. Embeddings are requested EMBED_BATCH_SIZE posts at a time and checked for
+    duplicates against a DeduplicationIndex, which also compares posts within
+    the run against each other. Network-bound stages run with
+    EMBED_CONCURRENCY / LLM_CONCURRENCY workers; dedup and persist run one at a
+    time to keep the index and session consistent; persist writes
+    PERSIST_BATCH_SIZE ratings per statement. Each chunk is committed on its
+    own.
+
+    Posts that already have a rating only repeat the stages that are stale:
+    the embedding when the text or embedding model changed, the LLM call when
+    the text or prompt version changed (or the post stops being a duplicate).
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        dedup_index: DeduplicationIndex,
+        stats: Optional[ScoringStats] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+    ):
+        self.session = session
+        self.dedup_index = dedup_index
+        self.lexical_index = lexical_index
+        self.stats = stats or ScoringStats()
+        # AsyncSession must not be used by two coroutines at once
+        self._session_lock = asyncio.Lock()
+        self._score_stage = self._build_score_stage()
+        self._stages = [
+            Stage("prefilter", self._prefilter, concurrency=1, batch_size=EMBED_BATCH_SIZE),
+            Stage("embed", self._embed, concurrency=EMBED_CONCURRENCY, batch_size=EMBED_BATCH_SIZE),
+            Stage("dedup", self._deduplicate, concurrency=1, batch_size=EMBED_BATCH_SIZE),
+            self._score_stage,
+            Stage("persist", self._persist, concurrency=1, batch_size=PERSIST_BATCH_SIZE),
+        ]
+
+    def _build_score_stage(self) -> Stage:
+        # Packing several posts per request only pays off when it is enabled
+        if LLM_BATCH_MAX_POSTS > 1:
+            return Stage("score", self._score_batch, concurrency=LLM_CONCURRENCY, batch_size=LLM_BATCH_MAX_POSTS)
+        return Stage("score", self._score, concurrency=LLM_CONCURRENCY)
+
+    async def score_chunk(self, posts: List[Post]):
+        """
+        Score one chunk of posts and commit the results.
+
+        Raises:
+            Exception: If the commit fails; the chunk is rolled back
+        """
+        if DEDUP_BACKEND == "pgvector":
+            # Earlier chunks are committed and found through the HNSW index; the
+            # in-memory index only has to cover posts of this chunk
+            self.dedup_index = DeduplicationIndex()
+        # Readability is a cheap local formula, computed for the whole chunk at once
+        flesch_kincaid, gunning_fog = readability_scores([post.content for post in posts])
+        previous = await self._load_previous(posts)
+        work_items = []
+        for post, fk, fog in zip(posts, flesch_kincaid, gunning_fog):
+            work = _PostWork(
+                post=post,
+                flesch_kincaid=float(fk),
+                gunning_fog=float(fog),
+                content_hash=content_hash(post.title, post.content),
+                previous=previous.get(post.id),
+            )
+            _plan_work(work)
+            # Up to date already, e.g. re-scored by another run since it was selected
+            if work.needs_embedding or work.needs_rating:
+                work_items.append(work)
+        if self.lexical_index is not None:
+            await self._flag_exact_duplicates(work_items)
+        await run_pipeline(work_items, self._stages, on_error=self._on_error)
+
+        # Commit per chunk so an interrupted run keeps everything scored so far
         try:
-            # 1. Get embedding
-            embedding = get_post_embedding(post.title, post.content)
-
-            # Validate the embedding before proceeding
-            if embedding is None or (isinstance(embedding, dict) and not embedding) or (
-                isinstance(embedding, list) and not embedding):
-                logging.error(f"Invalid embedding returned for post {post.id}: {embedding}")
-                error_count += 1
-                continue
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            self.dedup_index.remove([work.post.id for work in work_items if work.indexed])
+            if self.lexical_index is not None:
+                self.lexical_index.remove([work.post.id for work in work_items if work.lexical_indexed])
+            logging.error(f"Failed to commit changes: {str(e)}", exc_info=True)
+            raise
+        # Drop the chunk's posts and ratings from the identity map to keep memory flat
+        self.session.expunge_all()
 
-            # If embedding is a dict with values, convert it to a list
-            if isinstance(embedding, dict):
-                try:
-                    embedding = list(embedding.values())
-                except Exception as e:
-                    logging.error(f"Failed to convert dict embedding to list for post {post.id}: {embedding} ({e})")
-                    error_count += 1
-                    continue
-
-            # Ensure it's a valid, non-empty list with numeric values
-            if (
-                not isinstance(embedding, list) or
-                len(embedding) == 0 or
-                not all(isinstance(x, (int, float)) for x in embedding)
-            ):
-                logging.error(f"Embedding for post {post.id} is not a valid numeric 1D list: {embedding}")
-                error_count += 1
+    async def _load_previous(self, posts: List[Post]) -> dict:
+        """Existing ratings of posts in the chunk, by post id."""
+        post_ids = [post.id for post in posts if post.aiRatingId is not None]
+        if not post_ids:
+            return {}
+        result = await self.session.execute(select(AIPostRating).where(AIPostRating.postId.in_(post_ids)))
+        return {rating.postId: rating for rating in result.scalars()}
+
+    async def _flag_exact_duplicates(self, work_items: List[_PostWork]):
+        # One indexed lookup per chunk for copies of posts rated earlier
+        hashes = {work.post.id: work.content_hash for work in work_items if work.needs_embedding}
+        originals = await find_exact_duplicates(self.session, hashes)
+        for work in work_items:
+            if work.post.id in originals:
+                self._mark_lexical_duplicate(work, originals[work.post.id], 1.0)
+
+    def _mark_lexical_duplicate(self, work: _PostWork, original_id: int, similarity: float):
+        logging.info(f"Post {work.post.id} detected as lexical duplicate of post {original_id} (similarity: {similarity:.4f})")
+        work.similarity = similarity
+        work.duplicate = True
+        work.needs_embedding = False
+        work.ai_rating = _duplicate_rating(work)
+
+    async def _prefilter(self, batch: List[_PostWork]):
+        if self.lexical_index is None:
+            return batch
+        check, kept = [], []
+        for work in batch:
+            work.lexical_signature = self.lexical_index.signature(work.post.title, work.post.content)
+            if work.duplicate:
+                # Exact copy: store the signature with the rating, but never index a duplicate
+                work.ai_rating = _duplicate_rating(work)
+            elif work.needs_embedding:
+                check.append(work)
+            elif work.lexical_signature is not None and not _was_duplicate(work):
+                # Unchanged text; new to the index if rated before signatures existed
+                kept.append(work)
+
+        # check_batch indexes the posts that are not lexical duplicates; they are
+        # removed again if they turn out to be duplicates or never get persisted
+        matches = self.lexical_index.check_batch(
+            [work.lexical_signature for work in check], [work.post.id for work in check]
+        )
+        for work, (original_id, similarity) in zip(check, matches):
+            if similarity >= self.lexical_index.threshold:
+                self._mark_lexical_duplicate(work, original_id, similarity)
+            elif work.lexical_signature is not None:
+                work.lexical_indexed = True
+        self.lexical_index.add([work.lexical_signature for work in kept], [work.post.id for work in kept])
+        return batch
+
+    async def _embed(self, batch: List[_PostWork]):
+        todo = [work for work in batch if work.needs_embedding]
+        if todo:
+            embeddings = await aget_post_embeddings(
+                [(work.post.title, work.post.content) for work in todo],
+                batch_size=EMBED_BATCH_SIZE,
+            )
+            for work, embedding in zip(todo, embeddings):
+                work.embedding = embedding
+        return batch
+
+    async def _deduplicate(self, batch: List[_PostWork]):
+        todo = [work for work in batch if work.needs_embedding]
+        if todo:
+            embeddings = [work.embedding for work in todo]
+            post_ids = [work.post.id for work in todo]
+            # Off the event loop: the multiply covers every stored embedding
+            similarities = await asyncio.to_thread(self.dedup_index.query, embeddings, post_ids)
+            if DEDUP_BACKEND == "pgvector":
+                async with self._session_lock:
+                    # A failed lookup must not abort the chunk's transaction
+                    async with self.session.begin_nested():
+                        neighbours = await nearest_neighbours(self.session, embeddings, post_ids=post_ids)
+                similarities = np.maximum(similarities, [similarity for _, similarity in neighbours])
+            for work, similarity in zip(todo, similarities):
+                work.similarity = float(similarity)
+            # Originals are indexed right away so later batches of the run are checked
+            # against them, and removed again in _on_error if they never get persisted
+            originals = [work for work in todo if work.similarity < SIMILARITY_THRESHOLD]
+            await asyncio.to_thread(
+                self.dedup_index.add, [work.embedding for work in originals], [work.post.id for work in originals]
+            )
+            for work in originals:
+                work.indexed = True
+
+        for work in batch:
+            if work.duplicate:
                 continue
-            
-            # 2. Get similarity score
-            similarity_score = await compute_similarity_score(session, embedding)
-            
-            # 3. Check if it's a duplicate
-            if similarity_score >= SIMILARITY_THRESHOLD:
-                logging.info(f"Post {post.id} detected as duplicate (similarity: {similarity_score:.4f})")
-                
-                # Create rating with duplicate flag
-                ai_rating = AIPostRating(
-                    postId=post.id,
-                    embedding=embedding,
-                    similarityScore=similarity_score,
-                    rating=0,  # Zero rating for duplicates
-                    justification="Duplicate content. This post is too similar to existing content.",
-                    sentimentAnalysisLabel="Neutral",  # Default values for required fields
-                    sentimentAnalysisScore=0.5,
-                    biasDetectionScore=0.0,
-                    biasDetectionDirection="neutral",
-                    originalityScore=0.0,  # Low originality for duplicates
-                    readabilityFleschKincaid=0.0,
-                    readabilityGunningFog=0.0,
-                    mainTopic="duplicate content",
-                    secondaryTopics=["duplicate"]
-                )
-                duplicate_count += 1
-                
+            if work.similarity >= SIMILARITY_THRESHOLD:
+                logging.info(f"Post {work.post.id} detected as duplicate (similarity: {work.similarity:.4f})")
+                work.duplicate = True
+                work.ai_rating = _duplicate_rating(work)
+                if work.lexical_indexed:
+                    self.lexical_index.remove([work.post.id])
+                    work.lexical_indexed = False
+            elif not work.needs_rating and not _was_duplicate(work):
+                work.ai_rating = _rating_from_previous(work)
+        return batch
+
+    async def _score(self, work: _PostWork):
+        if work.ai_rating is not None:
+            return work
+        logging.info(f"Scoring post {work.post.id} (similarity: {work.similarity:.4f})")
+        rating_data = await score_post(work.post.title, work.post.content)
+
+        work.ai_rating = _rating_from_score(work, rating_data)
+        return work
+
+    async def _score_batch(self, batch: List[_PostWork]):
+        pending = [work for work in batch if work.ai_rating is None]
+        if pending:
+            logging.info(f"Scoring {len(pending)} posts in batch mode (ids {', '.join(str(w.post.id) for w in pending)})")
+            results = await score_posts_batch([(work.post.title, work.post.content) for work in pending])
+            for work, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    self._on_error(self._score_stage, work, result)
+                    work.ai_rating = None
+                else:
+                    work.ai_rating = _rating_from_score(work, result)
+        return [work for work in batch if work.ai_rating is not None]
+
+    async def _persist(self, batch: List[_PostWork]):
+        async with self._session_lock:
+            # A savepoint per batch, so a failed write only loses this batch
+            async with self.session.begin_nested():
+                await save_ratings(self.session, [work.ai_rating for work in batch])
+
+        for work in batch:
+            if work.duplicate:
+                self.stats.duplicates += 1
+                record_post_outcome("duplicate")
             else:
-                # 4. Not a duplicate, use OpenAI to rate
-                logging.info(f"Scoring post {post.id} (similarity: {similarity_score:.4f})")
-                rating_data = await score_post(post.title, post.content)
-                
-                # Merge rating data with embedding and similarity
-                data = rating_data.dict()
-                data.pop("similarityScore", None)
-                ai_rating = AIPostRating(
-                    postId=post.id,
-                    embedding=embedding,
-                    similarityScore=similarity_score,
-                    **data
-                )
-                processed_count += 1
-            
-            # Add the rating to session
-            session.add(ai_rating)
-            
-            # Update post with rating ID
-            post.aiRatingId = ai_rating.id  # This will work after session.flush()
-            await session.flush()  # Flush to get the ID
-            
-        except Exception as e:
-            logging.error(f"Failed to score post {post.id}: {str(e)}", exc_info=True)
-            error_count += 1
-    
-    # Commit all changes at once
-    try:
-        await session.commit()
-        logging.info(f"Processed {processed_count} posts, found {duplicate_count} duplicates, encountered {error_count} errors")
-    except Exception as e:
-        await session.rollback()
-        logging.error(f"Failed to commit changes: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+                self.stats.processed += 1
+                record_post_outcome("scored")
+        return batch
+
+    def _on_error(self, stage: Stage, work: _PostWork, e: Exception):
+        logging.error(f"Failed to score post {work.post.id} at stage '{stage.name}': {str(e)}", exc_info=True)
+        self.stats.errors += 1
+        record_post_outcome("error")
+        if work.indexed:
+            # Otherwise a copy later in the run would be rated as a duplicate of a post that has no rating
+            self.dedup_index.remove([work.post.id])
+            work.indexed = False
+        if work.lexical_indexed:
+            self.lexical_index.remove([work.post.id])
+            work.lexical_indexed = False
+
+
+async def count_unrated_posts(session: AsyncSession) -> int:
+    """Number of published posts still waiting for a rating."""
+    stmt = select(func.count()).select_from(Post).where(Post.aiRatingId == None, Post.published == True)
+    return (await session.execute(stmt)).scalar_one()
+
+
+async def score_new_posts(session: AsyncSession, stats: Optional[ScoringStats] = None, mode: str = "new"):
+    """
+    Process and score all unrated published posts, handling duplicates gracefully.
+
+    Posts are streamed SCORING_CHUNK_SIZE at a time and committed per chunk;
+    see PostScorer for the pipeline each chunk goes through.
+
+    Args:
+        session: SQLAlchemy async session
+        stats: Counters to update while running, e.g. for progress reporting
+        mode: "new" for unrated posts only, "incremental" to also re-score
+            posts whose text, embedding model or prompt changed
+
+    Returns:
+        ScoringStats: Counters for the run
+    """
+    # Existing embeddings are loaded once; new ones are appended as batches are checked
+    with profile_run("score_new_posts"):
+        if mode == "incremental":
+            await refresh_content_hashes(session)
+            chunks = iter_stale_posts(session, SCORING_CHUNK_SIZE)
+        else:
+            chunks = iter_unrated_posts(session, SCORING_CHUNK_SIZE)
+        scorer = PostScorer(session, await load_dedup_index(session), stats, await load_lexical_index(session))
+
+        async for posts in chunks:
+            logging.info(f"Scoring chunk of {len(posts)} {mode} posts (ids {posts[0].id}-{posts[-1].id})")
+            await scorer.score_chunk(posts)
+
+    stats = scorer.stats
+    logging.info(f"Processed {stats.processed} posts, found {stats.duplicates} duplicates, encountered {stats.errors} errors")
+    logging.info(f"Embedding cache: {embedding_cache_stats()}, rating cache: {rating_cache_stats()}")
+    return stats
+
+
+async def score_claimed_posts(
+    session: AsyncSession,
+    worker_id: str,
+    dedup_index: DeduplicationIndex,
+    mode: str = "new",
+    lexical_index: Optional[LexicalIndex] = None,
+) -> ScoringStats:
+    """
+    Repeatedly lease a chunk of unrated posts and score it until none are left.
+
+    Safe to run from many processes at once: claim_unrated_posts hands each post
+    to exactly one worker. Posts that fail keep their lease until it expires and
+    are then picked up again by whichever worker claims next.
+
+    Args:
+        session: SQLAlchemy async session
+        worker_id: Identifier recorded on leased posts
+        dedup_index: Index to check duplicates against; refreshed here with
+            ratings written by other workers since it was last used
+        mode: As for score_new_posts; in "incremental" mode the caller runs
+            refresh_content_hashes() once before fanning out
+        lexical_index: Optional prefilter index, refreshed like dedup_index
+
+    Returns:
+        ScoringStats: Counters for this worker
+    """
+    with profile_run("score_claimed_posts"):
+        if DEDUP_BACKEND != "pgvector":
+            await dedup_index.refresh(session)
+        if lexical_index is not None:
+            await lexical_index.refresh(session)
+        scorer = PostScorer(session, dedup_index, lexical_index=lexical_index)
+        candidates = stale_posts_query(Post.id) if mode == "incremental" else None
+
+        while True:
+            posts = await claim_unrated_posts(session, worker_id, SCORING_CHUNK_SIZE, SCORING_LEASE_SECONDS, candidates)
+            if not posts:
+                break
+            logging.info(f"Worker {worker_id} claimed {len(posts)} posts (ids {posts[0].id}-{posts[-1].id})")
+            await scorer.score_chunk(posts)
+
+    stats = scorer.stats
+    logging.info(f"Worker {worker_id} processed {stats.processed} posts, found {stats.duplicates} duplicates, encountered {stats.errors} errors")
+    return stats
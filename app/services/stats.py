@@ -0,0 +1,9 @@
+#app/services/stats.py
+from dataclasses import dataclass
+
+
+@dataclass
+class ScoringStats:
+    processed: int = 0
+    duplicates: int = 0
+    errors: int = 0
@@ -0,0 +1,357 @@
+#app/utils/cache.py
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+from app.config import REDIS_CACHE_MAX_ITEMS, REDIS_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Bounded in-process cache that evicts the least recently used entry.
+
+    With a ttl (seconds), entries also expire that long after being set.
+    """
+
+    def __init__(self, max_items: int, ttl: Optional[float] = None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                return None
+            value, expires_at = self._data[key]
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        if self.max_items <= 0:
+            return
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore:
+    """
+    Durable key/value store in a local SQLite file.
+
+    Rows carry a last-access timestamp so the store can be trimmed back to
+    max_items by dropping the least recently used keys. Trimming runs once every
+    max_items / 10 writes rather than on every write. With a ttl (seconds),
+    rows are ignored and eventually deleted once they expire.
+
+    Reads never commit: access times are collected in memory and written with
+    the next set_many(), or once TOUCH_FLUSH_SIZE of them are pending. In WAL
+    mode with synchronous=NORMAL a commit does not fsync either.
+    """
+
+    TOUCH_FLUSH_SIZE = 1000
+
+    def __init__(self, path: str, table: str, max_items: int = 0, ttl: Optional[float] = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.table = table
+        self.max_items = max_items
+        self.ttl = ttl
+        self._writes_since_trim = 0
+        self._pending_touches = {}  # key -> access time not yet written
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" '
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed_at REAL NOT NULL, expires_at REAL)"
+        )
+        columns = {row[1] for row in self._conn.execute(f'PRAGMA table_info("{table}")')}
+        if "expires_at" not in columns:
+            self._conn.execute(f'ALTER TABLE "{table}" ADD COLUMN expires_at REAL')
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_accessed_at" ON "{table}" (accessed_at)')
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT key, value FROM "{self.table}" WHERE key IN ({placeholders}) '
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                keys + [time.time()],
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self._pending_touches.update((key, now) for key, _ in rows)
+                if len(self._pending_touches) >= self.TOUCH_FLUSH_SIZE:
+                    self._flush_touches()
+                    self._conn.commit()
+        return {key: value for key, value in rows}
+
+    def _flush_touches(self):
+        # Caller holds the lock and commits
+        if self._pending_touches:
+            self._conn.executemany(
+                f'UPDATE "{self.table}" SET accessed_at = ? WHERE key = ?',
+                [(accessed_at, key) for key, accessed_at in self._pending_touches.items()],
+            )
+            self._pending_touches.clear()
+
+    def set_many(self, items: Dict[str, bytes]):
+        if not items:
+            return
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._flush_touches()
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO "{self.table}" (key, value, accessed_at, expires_at) VALUES (?, ?, ?, ?)',
+                [(key, value, now, expires_at) for key, value in items.items()],
+            )
+            self._writes_since_trim += len(items)
+            if self.max_items > 0 and self._writes_since_trim >= max(1, self.max_items // 10):
+                self._writes_since_trim = 0
+                self._conn.execute(f'DELETE FROM "{self.table}" WHERE expires_at <= ?', (now,))
+                self._conn.execute(
+                    f'DELETE FROM "{self.table}" WHERE key IN ('
+                    f'SELECT key FROM "{self.table}" ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_items,),
+                )
+            self._conn.commit()
+
+
+class RedisStore:
+    """
+    Durable key/value store in Redis, shared by every process using the broker.
+
+    The store bounds itself instead of relying on the server's maxmemory
+    policy, since it usually shares Redis with the Celery broker: allkeys-lru
+    could evict queued task messages, and noeviction would let the cache fill
+    memory until broker writes fail. Every key expires after ttl seconds, and
+    a sorted set of keys by last access is trimmed back to max_items once
+    every max_items / 10 writes, dropping the least recently used keys.
+    """
+
+    def __init__(self, url: str, namespace: str, max_items: int, ttl: float):
+        import redis
+
+        self.namespace = namespace
+        self.max_items = max_items
+        self.ttl = int(ttl)
+        self._index = f"{namespace}:__lru__"
+        self._writes_since_trim = 0
+        self._lock = threading.Lock()
+        self._client = redis.Redis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.mget([self._key(key) for key in keys])
+        found = {key: value for key, value in zip(keys, values) if value is not None}
+        if found:
+            now = time.time()
+            pipe = self._client.pipeline(transaction=False)
+            pipe.zadd(self._index, {key: now for key in found}, xx=True)
+            for key in found:
+                pipe.expire(self._key(key), self.ttl)
+            pipe.execute()
+        return found
+
+    def set_many(self, items: Dict[str, bytes]):
+        if not items:
+            return
+        now = time.time()
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self._key(key), value, ex=self.ttl)
+        pipe.zadd(self._index, {key: now for key in items})
+        pipe.expire(self._index, self.ttl)
+        pipe.execute()
+
+        with self._lock:
+            self._writes_since_trim += len(items)
+            if self._writes_since_trim < max(1, self.max_items // 10):
+                return
+            self._writes_since_trim = 0
+        self._trim(now)
+
+    def _trim(self, now: float):
+        # Entries of keys that already expired, then the least recently used overflow
+        self._client.zremrangebyscore(self._index, "-inf", now - self.ttl)
+        excess = self._client.zcard(self._index) - self.max_items
+        if excess <= 0:
+            return
+        oldest = self._client.zrange(self._index, 0, excess - 1)
+        if not oldest:
+            return
+        pipe = self._client.pipeline(transaction=False)
+        pipe.delete(*[self._key(key.decode("utf-8")) for key in oldest])
+        pipe.zrem(self._index, *oldest)
+        pipe.execute()
+
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional durable store.
+
+    Values are converted with encode/decode at the durable boundary and, with a
+    ttl (seconds), expire in both tiers. Lookups are counted per tier so hit rates can be used to size the cache; failures of the
+    durable tier are logged and treated as misses.
+
+    With memory_encoded, the LRU also holds encoded values and decodes them on
+    every hit, e.g. float32 bytes instead of lists of Python floats. Async code
+    uses aget_many/aset_many, which run the durable tier in a thread.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        durable=None,
+        encode: Callable = lambda value: value,
+        decode: Callable = lambda value: value,
+        ttl: Optional[float] = None,
+        memory_encoded: bool = False,
+    ):
+        self.memory = LRUCache(max_items, ttl=ttl)
+        self.durable = durable
+        self.encode = encode
+        self.decode = decode
+        self.memory_encoded = memory_encoded
+        self.memory_hits = 0
+        self.durable_hits = 0
+        self.misses = 0
+
+    def _memory_lookup(self, keys: Iterable[str]):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = self.decode(value) if self.memory_encoded else value
+        self.memory_hits += len(found)
+        return found, missing
+
+    def _durable_get(self, missing) -> Dict[str, bytes]:
+        if not missing or self.durable is None:
+            return {}
+        try:
+            return self.durable.get_many(missing)
+        except Exception as e:
+            logger.warning(f"Durable cache read failed: {e}")
+            return {}
+
+    def _merge_stored(self, found, missing, stored) -> Dict[str, object]:
+        for key, raw in stored.items():
+            value = self.decode(raw)
+            self.memory.set(key, raw if self.memory_encoded else value)
+            found[key] = value
+        self.durable_hits += len(stored)
+        self.misses += len(missing) - len(stored)
+        return found
+
+    def _memory_store(self, items: Dict[str, object]) -> Dict[str, bytes]:
+        """Put items in the LRU and return them encoded for the durable tier."""
+        encoded = {}
+        for key, value in items.items():
+            if self.memory_encoded or self.durable is not None:
+                encoded[key] = self.encode(value)
+            self.memory.set(key, encoded[key] if self.memory_encoded else value)
+        return encoded
+
+    def _durable_set(self, encoded: Dict[str, bytes]):
+        if not encoded or self.durable is None:
+            return
+        try:
+            self.durable.set_many(encoded)
+        except Exception as e:
+            logger.warning(f"Durable cache write failed: {e}")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        found, missing = self._memory_lookup(keys)
+        return self._merge_stored(found, missing, self._durable_get(missing))
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        found, missing = self._memory_lookup(keys)
+        stored = await asyncio.to_thread(self._durable_get, missing) if missing and self.durable is not None else {}
+        return self._merge_stored(found, missing, stored)
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    async def aget(self, key: str):
+        return (await self.aget_many([key])).get(key)
+
+    def set_many(self, items: Dict[str, object]):
+        self._durable_set(self._memory_store(items))
+
+    async def aset_many(self, items: Dict[str, object]):
+        encoded = self._memory_store(items)
+        if encoded and self.durable is not None:
+            await asyncio.to_thread(self._durable_set, encoded)
+
+    def set(self, key: str, value):
+        self.set_many({key: value})
+
+    async def aset(self, key: str, value):
+        await self.aset_many({key: value})
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.durable_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "durable_hits": self.durable_hits,
+            "misses": self.misses,
+            "memory_items": len(self.memory),
+            "hit_rate": (self.memory_hits + self.durable_hits) / lookups if lookups else 0.0,
+        }
+
+
+def build_durable_store(
+    backend: str,
+    namespace: str,
+    path: str,
+    max_items: int = 0,
+    redis_url: Optional[str] = None,
+    ttl: Optional[float] = None,
+):
+    """
+    Create the durable tier named by backend ("sqlite", "redis" or "none").
+
+    In Redis the store is capped at REDIS_CACHE_MAX_ITEMS keys and keys expire
+    after ttl, or REDIS_CACHE_TTL_SECONDS without one, so the cache cannot
+    crowd out the broker.
+    """
+    if backend == "sqlite":
+        return SQLiteStore(path, namespace, max_items=max_items, ttl=ttl)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_BROKER must be set to use the redis cache backend")
+        redis_max_items = min(max_items, REDIS_CACHE_MAX_ITEMS) if max_items > 0 else REDIS_CACHE_MAX_ITEMS
+        return RedisStore(redis_url, namespace, max_items=redis_max_items, ttl=ttl or REDIS_CACHE_TTL_SECONDS)
+    return None
@@ -0,0 +1,108 @@
+#app/utils/clients.py
+from typing import TYPE_CHECKING
+import logging
+from app.config import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    OLLAMA_BASE_URL,
+    LLM_HTTP_MAX_CONNECTIONS,
+    EMBED_HTTP_MAX_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    LLM_TIMEOUT_SECONDS,
+    EMBED_TIMEOUT_SECONDS,
+)
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_ollama import OllamaEmbeddings
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# Configure your Ollama model name
+OLLAMA_MODEL = "nomic-embed-text"
+
+# Shared clients, created on first use and closed by close_clients(). The SDKs
+# are imported there too, so processes that never score do not pay for them.
+_llm_client = None
+_embedder = None
+
+
+def _limits(max_connections: int) -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_llm_client() -> "AsyncOpenAI":
+    """
+    Return the shared AsyncOpenAI client, creating it on first use.
+
+    Its connection pool is sized to LLM_HTTP_MAX_CONNECTIONS and kept alive
+    between requests, so scoring does not repeat TCP/TLS setup per call.
+    """
+    global _llm_client
+    if _llm_client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=_limits(LLM_HTTP_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT),
+        )
+        # Retries are left to the call governor (app/utils/governor.py), which
+        # also adapts concurrency to 429s the SDK would otherwise hide
+        _llm_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, http_client=http_client, max_retries=0
+        )
+    return _llm_client
+
+
+def get_embedder() -> "OllamaEmbeddings":
+    """Return the shared OllamaEmbeddings instance, creating it on first use."""
+    global _embedder
+    if _embedder is None:
+        import httpx
+        from langchain_ollama import OllamaEmbeddings
+
+        _embedder = OllamaEmbeddings(
+            model=OLLAMA_MODEL,
+            base_url=OLLAMA_BASE_URL,
+            client_kwargs={
+                "limits": _limits(EMBED_HTTP_MAX_CONNECTIONS),
+                "timeout": httpx.Timeout(EMBED_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT),
+            },
+        )
+    return _embedder
+
+
+async def close_clients():
+    """
+    Close the shared HTTP clients and forget them.
+
+    Clients are bound to the event loop they were used on, so anything that
+    runs its own loop (e.g. a Celery task) must call this before the loop ends.
+    The next get_* call creates fresh clients.
+    """
+    from app.utils.governor import reset_governors
+
+    global _llm_client, _embedder
+    llm_client, embedder = _llm_client, _embedder
+    _llm_client = _embedder = None
+    reset_governors()
+    try:
+        if llm_client is not None:
+            await llm_client.close()
+        if embedder is not None:
+            # OllamaEmbeddings has no close(); its ollama clients own the connection pools
+            if embedder._async_client is not None:
+                await embedder._async_client.close()
+            if embedder._client is not None:
+                embedder._client.close()
+    except Exception as e:
+        logger.warning(f"Failed to close HTTP clients: {e}")
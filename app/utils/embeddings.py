@@ -1,12 +1,99 @@
 #app/utils/embeddings.py
-from langchain_ollama import OllamaEmbeddings
-from typing import List
+from array import array
+from typing import List, Sequence, Tuple
 import logging
-from app.config import OLLAMA_BASE_URL
+from app.config import (
+    EMBED_BATCH_SIZE,
+    EMBED_CONCURRENCY,
+    REDIS_BROKER,
+    EMBEDDING_CACHE_MAX_ITEMS,
+    EMBEDDING_CACHE_BACKEND,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_DURABLE_MAX_ITEMS,
+)
+from app.utils.cache import TieredCache, build_durable_store
+from app.utils.clients import OLLAMA_MODEL, get_embedder
+from app.utils.governor import get_governor
+from app.utils.text import content_hash
 
 
-# Configure your Ollama model name
-OLLAMA_MODEL = "nomic-embed-text"
+# Content-hash keyed embedding cache, see get_embedding_cache()
+_cache = None
+
+
+def _encode_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(raw: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(raw)
+    return vector.tolist()
+
+
+def get_embedding_cache() -> TieredCache:
+    """Return the shared embedding cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        durable = build_durable_store(
+            EMBEDDING_CACHE_BACKEND,
+            "embeddings",
+            EMBEDDING_CACHE_PATH,
+            max_items=EMBEDDING_CACHE_DURABLE_MAX_ITEMS,
+            redis_url=REDIS_BROKER,
+        )
+        # float32 bytes in memory too: ~3 KB per 768-dim vector instead of ~25 KB as a list
+        _cache = TieredCache(
+            EMBEDDING_CACHE_MAX_ITEMS, durable, encode=_encode_vector, decode=_decode_vector, memory_encoded=True
+        )
+    return _cache
+
+
+def embedding_cache_stats() -> dict:
+    """Hit/miss counters of the embedding cache for this process."""
+    return get_embedding_cache().stats()
+
+
+def _cache_key(title: str, content: str) -> str:
+    # The model is part of the key so switching models never serves stale vectors
+    return f"{OLLAMA_MODEL}:{content_hash(title, content)}"
+
+
+def _post_text(title: str, content: str) -> str:
+    return f"{title}\n{content}"
+
+
+def _validate_vectors(vectors, expected: int) -> List[List[float]]:
+    if not isinstance(vectors, list) or len(vectors) != expected:
+        raise ValueError(f"Expected {expected} embeddings, got {len(vectors) if isinstance(vectors, list) else type(vectors)}")
+    for embedding in vectors:
+        if not isinstance(embedding, list) or not all(isinstance(x, (float, int)) for x in embedding):
+            raise ValueError("Embedding output is not a float vector.")
+    return vectors
+
+
+def _batches(posts: Sequence[Tuple[str, str]], batch_size: int):
+    batch_size = max(1, batch_size)
+    for start in range(0, len(posts), batch_size):
+        yield [_post_text(title, content) for title, content in posts[start:start + batch_size]]
+
+
+def _missing_posts(posts, keys, cached) -> List[Tuple[str, Tuple[str, str]]]:
+    """(key, post) pairs not served from the cache, one per distinct key."""
+    missing = {}
+    for key, post in zip(keys, posts):
+        if key not in cached and key not in missing:
+            missing[key] = post
+    return list(missing.items())
+
+
+def _fresh_vectors(missing, embeddings) -> dict:
+    return {key: embedding for (key, _), embedding in zip(missing, embeddings)}
+
+
+def _merge_cached(keys, cached, fresh) -> List[List[float]]:
+    """One embedding per input key, from the cache or freshly computed."""
+    return [cached[key] if key in cached else fresh[key] for key in keys]
 
 
 def get_post_embedding(title: str, content: str) -> List[float]:
@@ -20,13 +107,79 @@ def get_post_embedding(title: str, content: str) -> List[float]:
     Raises:
         RuntimeError: If embedding fails
     """
+    return get_post_embeddings([(title, content)])[0]
+
+
+async def aget_post_embedding(title: str, content: str) -> List[float]:
+    """
+    Async variant of get_post_embedding that does not block the event loop.
+    Args:
+        title (str): The post title
+        content (str): The post content
+    Returns:
+        List[float]: Embedding vector (length depends on model, usually 768)
+    Raises:
+        RuntimeError: If embedding fails
+    """
+    return (await aget_post_embeddings([(title, content)]))[0]
+
+
+def get_post_embeddings(posts: Sequence[Tuple[str, str]], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    """
+    Embed many posts, sending batch_size texts per Ollama request.
+    Posts whose normalized text is already cached are not sent to Ollama.
+    Args:
+        posts: Sequence of (title, content) pairs
+        batch_size (int): Maximum number of texts per request
+    Returns:
+        List[List[float]]: One embedding per post, in input order
+    Raises:
+        RuntimeError: If any batch fails
+    """
     try:
-        text = f"{title}\n{content}"
-        embedder = OllamaEmbeddings(model=OLLAMA_MODEL, base_url=OLLAMA_BASE_URL)
-        embedding = embedder.embed_query(text)
-        if not isinstance(embedding, list) or not all(isinstance(x, (float, int)) for x in embedding):
-            raise ValueError("Embedding output is not a float vector.")
-        return embedding
+        cache = get_embedding_cache()
+        keys = [_cache_key(title, content) for title, content in posts]
+        cached = cache.get_many(keys)
+        missing = _missing_posts(posts, keys, cached)
+
+        embedder = get_embedder()
+        embeddings = []
+        for texts in _batches([post for _, post in missing], batch_size):
+            embeddings.extend(_validate_vectors(embedder.embed_documents(texts), len(texts)))
+        fresh = _fresh_vectors(missing, embeddings)
+        cache.set_many(fresh)
+        return _merge_cached(keys, cached, fresh)
+    except Exception as e:
+        logging.error(f"Failed to generate embeddings: {e}")
+        raise RuntimeError(f"Embedding failed: {e}")
+
+
+async def aget_post_embeddings(posts: Sequence[Tuple[str, str]], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    """
+    Async variant of get_post_embeddings.
+    Args:
+        posts: Sequence of (title, content) pairs
+        batch_size (int): Maximum number of texts per request
+    Returns:
+        List[List[float]]: One embedding per post, in input order
+    Raises:
+        RuntimeError: If any batch fails
+    """
+    try:
+        cache = get_embedding_cache()
+        keys = [_cache_key(title, content) for title, content in posts]
+        cached = await cache.aget_many(keys)
+        missing = _missing_posts(posts, keys, cached)
+
+        embedder = get_embedder()
+        governor = get_governor(OLLAMA_MODEL, EMBED_CONCURRENCY)
+        embeddings = []
+        for texts in _batches([post for _, post in missing], batch_size):
+            vectors = await governor.call(lambda: embedder.aembed_documents(texts))
+            embeddings.extend(_validate_vectors(vectors, len(texts)))
+        fresh = _fresh_vectors(missing, embeddings)
+        await cache.aset_many(fresh)
+        return _merge_cached(keys, cached, fresh)
     except Exception as e:
-        logging.error(f"Failed to generate embedding: {e}")
+        logging.error(f"Failed to generate embeddings: {e}")
         raise RuntimeError(f"Embedding failed: {e}")
@@ -0,0 +1,238 @@
+#app/utils/governor.py
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import logging
+import random
+import time
+from app.config import (
+    MODEL_CALL_MAX_RETRIES,
+    MODEL_CALL_BACKOFF_BASE,
+    MODEL_CALL_BACKOFF_MAX,
+    MODEL_RATE_LIMITS,
+)
+from app.services.metrics import record_concurrency_limit, record_retry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Network failures worth retrying, matched by class name so the SDKs do not
+# have to be imported here (openai, httpx and ollama all raise their own types)
+_TRANSIENT_ERRORS = {"APIConnectionError", "TransportError", "TimeoutException", "ConnectError"}
+
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """Parse "model=rps,model=rps" into a dict; malformed entries are ignored."""
+    limits = {}
+    for entry in spec.split(","):
+        model, _, rate = entry.partition("=")
+        try:
+            limits[model.strip()] = float(rate)
+        except ValueError:
+            if entry.strip():
+                logger.warning(f"Ignoring malformed MODEL_RATE_LIMITS entry: {entry!r}")
+    return limits
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_failure(error: Exception) -> Optional[str]:
+    """
+    Why a call failed, if retrying may help.
+
+    Returns:
+        str: "rate_limited" (429), "server_error" (5xx/408), "timeout" (network),
+            or None for failures a retry will not fix
+    """
+    status = _status_code(error)
+    if status == 429:
+        return "rate_limited"
+    if status is not None:
+        return "server_error" if status >= 500 or status == 408 else None
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return "timeout"
+    if any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__):
+        return "timeout"
+    return None
+
+
+class TokenBucket:
+    """Allows rate calls per second on average, with bursts of up to burst calls."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CallGovernor:
+    """
+    Concurrency limit, rate limit and retries shared by all calls to one model.
+
+    The number of calls in flight follows an AIMD controller: every success
+    raises the limit by 1/limit (about +1 per round of calls) up to
+    max_concurrency, and a 429 or 5xx halves it, at most once per second so a
+    burst of failures from the same round only counts once. Retryable failures
+    are retried up to max_retries times with jittered exponential backoff; a
+    Retry-After header overrides the backoff and pauses every caller of the
+    model until it has passed. With a rate (calls per second), calls also go
+    through a token bucket.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate: Optional[float] = None,
+        max_retries: int = MODEL_CALL_MAX_RETRIES,
+        backoff_base: float = MODEL_CALL_BACKOFF_BASE,
+        backoff_max: float = MODEL_CALL_BACKOFF_MAX,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.bucket = TokenBucket(rate) if rate else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+        record_concurrency_limit(name, self.limit)
+
+    async def _acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+        try:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            if self.bucket is not None:
+                await self.bucket.acquire()
+        except BaseException:
+            await self._settle("cancelled")
+            raise
+
+    async def _settle(self, reason: Optional[str]):
+        # Shielded so a cancellation while waiting for the lock cannot leak the slot
+        await asyncio.shield(self._release(reason))
+
+    async def _release(self, reason: Optional[str]):
+        async with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if reason in ("rate_limited", "server_error"):
+                if now - self._last_decrease >= 1.0:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._last_decrease = now
+                    logger.info(f"{self.name}: {reason}, concurrency limit lowered to {int(self.limit)}")
+            elif reason is None:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            record_concurrency_limit(self.name, self.limit)
+            self._condition.notify_all()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from many callers over the whole window
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def call(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run make_call() under the governor, retrying transient failures.
+
+        Args:
+            make_call: Function returning a new awaitable for each attempt
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            Exception: The last failure, once it is not retryable or retries run out
+        """
+        attempt = 0
+        while True:
+            await self._acquire()
+            try:
+                result = await make_call()
+            except Exception as e:
+                reason = classify_failure(e)
+                await self._settle(reason or "failed")
+                if reason is None or attempt >= self.max_retries:
+                    raise
+                wait = retry_after(e)
+                if wait is not None:
+                    self._paused_until = max(self._paused_until, time.monotonic() + wait)
+                else:
+                    wait = self._backoff(attempt)
+                attempt += 1
+                record_retry(reason)
+                logger.warning(f"{self.name}: {reason} ({e}); retry {attempt}/{self.max_retries} in {wait:.2f}s")
+                await asyncio.sleep(wait)
+            except BaseException:
+                # CancelledError and friends: free the slot without touching the limit
+                await self._settle("cancelled")
+                raise
+            else:
+                await self._settle(None)
+                return result
+
+
+_governors: Dict[str, CallGovernor] = {}
+_rate_limits = parse_rate_limits(MODEL_RATE_LIMITS)
+
+
+def get_governor(model: str, max_concurrency: int) -> CallGovernor:
+    """Return the shared governor for model, creating it on first use."""
+    governor = _governors.get(model)
+    if governor is None:
+        governor = CallGovernor(model, max_concurrency, rate=_rate_limits.get(model))
+        _governors[model] = governor
+    return governor
+
+
+def reset_governors():
+    """Forget all governors; their asyncio primitives belong to the current event loop."""
+    _governors.clear()
@@ -1,18 +1,31 @@
 # app/utils/openai_client.py
-from openai import OpenAI
+import hashlib
 import logging
 import json
 from pydantic import BaseModel, Field, ValidationError
-from typing import List
-from app.config import OPENAI_API_KEY, OPENAI_BASE_URL
+from typing import List, Sequence, Tuple, Union
+import asyncio
+from app.config import (
+    REDIS_BROKER,
+    RATING_CACHE_MAX_ITEMS,
+    RATING_CACHE_BACKEND,
+    RATING_CACHE_PATH,
+    RATING_CACHE_DURABLE_MAX_ITEMS,
+    RATING_CACHE_TTL_SECONDS,
+    LLM_BATCH_MAX_POSTS,
+    LLM_BATCH_TOKEN_BUDGET,
+    LLM_CONCURRENCY,
+)
+from app.utils.cache import TieredCache, build_durable_store
+from app.utils.text import content_hash
+from app.utils.clients import get_llm_client
+from app.utils.governor import get_governor
+from app.services.metrics import record_llm_failure, record_llm_response, record_retry
 
 # Logger setup
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-#client = OpenAI(api_key="ollama", base_url='http://localhost:11434/v1')
-client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-# Schema aligned with your DB model
+# Schema aligned with your DB model (readability is computed locally, see app/utils/readability.py)
 class ContentScore(BaseModel):
     rating: int = Field(..., ge=0, le=100)
     justification: str
@@ -22,33 +35,11 @@ class ContentScore(BaseModel):
     biasDetectionDirection: str
     originalityScore: float = Field(..., ge=0, le=1)
     similarityScore: float = Field(..., ge=0, le=1)
-    readabilityFleschKincaid: float
-    readabilityGunningFog: float
     mainTopic: str
     secondaryTopics: List[str]
 
-async def score_post(title: str, content: str, model: str = "gemini-2.0-flash") -> ContentScore:
-    """
-    Evaluate content and return structured ratings using prompt engineering for structured output.
-    
-    Args:
-        title: The title of the blog post
-        content: The full text content to evaluate
-        model: OpenAI model to use
-        
-    Returns:
-        ContentScore: Structured content evaluation
-        
-    Raises:
-        ValueError: For empty inputs
-        RuntimeError: For API or validation errors
-    """
-    if not title.strip() or not content.strip():
-        logger.error("Empty title or content provided")
-        raise ValueError("Title and content must be non-empty.")
-
-    # Define the expected JSON structure in the prompt
-    json_format = """{
+# Define the expected JSON structure in the prompt
+JSON_FORMAT = """{
   "rating": integer between 0-100,
   "justification": "detailed explanation",
   "sentimentAnalysisLabel": "One of: Very Positive, Positive, Neutral, Negative, Very Negative",
@@ -57,37 +48,123 @@ async def score_post(title: str, content: str, model: str = "gemini-2.0-flash")
   "biasDetectionDirection": "One of: strong left, moderate left, neutral, moderate right, strong right, non-political",
   "originalityScore": float between 0-1,
   "similarityScore": float between 0-1,
-  "readabilityFleschKincaid": float representing grade level,
-  "readabilityGunningFog": float representing index score,
   "mainTopic": "primary subject",
   "secondaryTopics": ["topic1", "topic2", "topic3"]
 }"""
 
-    system_prompt = f"""You are an expert content evaluator with experience in journalism, SEO, and content marketing.
+SYSTEM_PROMPT = f"""You are an expert content evaluator with experience in journalism, SEO, and content marketing.
 
 Evaluate this content objectively, considering clarity, coherence, accuracy, and value.
 Base your evaluation solely on the provided content. Remain objective regardless of subject matter.
 
 IMPORTANT: Your response MUST be valid JSON that matches this structure:
 
-{json_format}
+{JSON_FORMAT}
+
+Do NOT include any explanations, markdown formatting, or other text outside the JSON structure.
+Ensure all values conform to the specified types and ranges.
+"""
+
+USER_PROMPT_TEMPLATE = "Title: {title}\n\nContent: {content}"
+
+# Batch mode: several posts per request, scored independently with the same rubric
+BATCH_SYSTEM_PROMPT = f"""You are an expert content evaluator with experience in journalism, SEO, and content marketing.
+
+You will receive several independent posts, each introduced by a line "### Post <id>".
+Evaluate each post objectively and on its own, considering clarity, coherence, accuracy, and value.
+Base each evaluation solely on that post's content. Remain objective regardless of subject matter.
+
+IMPORTANT: Your response MUST be a valid JSON object of the form {{"results": [...]}} containing
+exactly one entry per post. Each entry has an "id" field with the post's id plus all fields of this structure:
+
+{JSON_FORMAT}
 
 Do NOT include any explanations, markdown formatting, or other text outside the JSON structure.
 Ensure all values conform to the specified types and ranges.
 """
 
+BATCH_POST_TEMPLATE = "### Post {id}\n" + USER_PROMPT_TEMPLATE
+
+# Changes whenever the prompt text is edited, which invalidates cached ratings
+PROMPT_VERSION = hashlib.sha256(
+    "\0".join([SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, BATCH_SYSTEM_PROMPT, BATCH_POST_TEMPLATE]).encode("utf-8")
+).hexdigest()[:16]
+
+_rating_cache = None
+
+
+def get_rating_cache() -> TieredCache:
+    """Return the shared ContentScore cache, creating it on first use."""
+    global _rating_cache
+    if _rating_cache is None:
+        durable = build_durable_store(
+            RATING_CACHE_BACKEND,
+            "ratings",
+            RATING_CACHE_PATH,
+            max_items=RATING_CACHE_DURABLE_MAX_ITEMS,
+            redis_url=REDIS_BROKER,
+            ttl=RATING_CACHE_TTL_SECONDS,
+        )
+        _rating_cache = TieredCache(
+            RATING_CACHE_MAX_ITEMS,
+            durable,
+            encode=lambda score: json.dumps(score.dict()).encode("utf-8"),
+            decode=lambda raw: ContentScore(**json.loads(raw)),
+            ttl=RATING_CACHE_TTL_SECONDS,
+        )
+    return _rating_cache
+
+
+def rating_cache_stats() -> dict:
+    """Hit/miss counters of the rating cache for this process."""
+    return get_rating_cache().stats()
+
+
+def rating_cache_key(title: str, content: str, model: str) -> str:
+    return f"{model}:{PROMPT_VERSION}:{content_hash(title, content)}"
+
+
+async def score_post(title: str, content: str, model: str = "gemini-2.0-flash") -> ContentScore:
+    """
+    Evaluate content and return structured ratings using prompt engineering for structured output.
+    
+    Args:
+        title: The title of the blog post
+        content: The full text content to evaluate
+        model: OpenAI model to use
+        
+    Returns:
+        ContentScore: Structured content evaluation
+        
+    Raises:
+        ValueError: For empty inputs
+        RuntimeError: For API or validation errors
+    """
+    if not (title or "").strip() or not (content or "").strip():
+        logger.error("Empty title or content provided")
+        raise ValueError("Title and content must be non-empty.")
+
+    # Identical content already scored with this model and prompt
+    cache_key = rating_cache_key(title, content, model)
+    cached = await get_rating_cache().aget(cache_key)
+    if cached is not None:
+        logger.info(f"Using cached rating for '{title}' (rating: {cached.rating})")
+        return cached
+
+    response = None
     try:
         logger.info(f"Evaluating content with title: '{title}' (length: {len(content)} chars)")
         
         # Make the API call requesting structured output
-        response = client.chat.completions.create(
-            model="gemini-2.0-flash",
+        response = await get_governor(model, LLM_CONCURRENCY).call(lambda: get_llm_client().chat.completions.create(
+            model=model,
             messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Title: {title}\n\nContent: {content}"}
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": USER_PROMPT_TEMPLATE.format(title=title, content=content)}
             ],
             response_format={"type": "json_object"}  # For models that support JSON mode
-        )
+        ))
+        record_llm_response(model, "single", response)
         
         # Extract and parse the response
         if not response or not hasattr(response, 'choices') or not response.choices:
@@ -109,6 +186,7 @@ Ensure all values conform to the specified types and ranges.
         content_score = ContentScore(**score_data)
         
         logger.info(f"Scoring completed for '{title}' with rating: {content_score.rating}")
+        await get_rating_cache().aset(cache_key, content_score)
         return content_score
 
     except ValidationError as ve:
@@ -119,4 +197,157 @@ Ensure all values conform to the specified types and ranges.
         raise RuntimeError(f"Failed to parse JSON response: {je}")
     except Exception as e:
         logger.error(f"API error: {str(e)}")
-        raise RuntimeError(f"Content scoring failed: {str(e)}")
\ No newline at end of file
+        if response is None:
+            record_llm_failure(model, "single")
+        raise RuntimeError(f"Content scoring failed: {str(e)}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) used for packing."""
+    return len(text) // 4 + 1
+
+
+def pack_batches(posts: Sequence[Tuple[str, str]], token_budget: int, max_posts: int) -> List[List[int]]:
+    """
+    Group post indices into batches whose prompt text fits token_budget.
+
+    Posts are packed greedily in order; a post larger than the budget gets a
+    batch of its own.
+
+    Args:
+        posts: Sequence of (title, content) pairs
+        token_budget: Maximum estimated tokens of post text per batch
+        max_posts: Maximum posts per batch
+
+    Returns:
+        List[List[int]]: Batches of indices into posts
+    """
+    batches, current, used = [], [], 0
+    for i, (title, content) in enumerate(posts):
+        tokens = estimate_tokens(title) + estimate_tokens(content)
+        if current and (used + tokens > token_budget or len(current) >= max_posts):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _score_packed(posts: Sequence[Tuple[str, str]], model: str) -> List[Union[ContentScore, None]]:
+    """
+    Score several posts in one chat completion.
+
+    Returns:
+        list: A validated ContentScore per post, or None where the model's entry
+            was missing or invalid
+
+    Raises:
+        RuntimeError: If the request fails or the response is not the expected JSON
+    """
+    user_content = "\n\n".join(
+        BATCH_POST_TEMPLATE.format(id=i, title=title, content=content)
+        for i, (title, content) in enumerate(posts)
+    )
+    response = None
+    try:
+        response = await get_governor(model, LLM_CONCURRENCY).call(lambda: get_llm_client().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": user_content}
+            ],
+            response_format={"type": "json_object"}
+        ))
+        record_llm_response(model, "batch", response)
+        entries = json.loads(response.choices[0].message.content.strip())["results"]
+        if not isinstance(entries, list):
+            raise ValueError("'results' is not a list")
+    except Exception as e:
+        logger.error(f"Batch scoring of {len(posts)} posts failed: {str(e)}")
+        if response is None:
+            record_llm_failure(model, "batch")
+        raise RuntimeError(f"Batch scoring failed: {str(e)}")
+
+    scores = [None] * len(posts)
+    for entry in entries:
+        try:
+            index = int(entry.pop("id"))
+            if 0 <= index < len(posts) and scores[index] is None:
+                scores[index] = ContentScore(**entry)
+        except (ValidationError, KeyError, TypeError, ValueError, AttributeError) as e:
+            logger.warning(f"Discarding invalid batch entry: {e}")
+    return scores
+
+
+async def score_posts_batch(
+    posts: Sequence[Tuple[str, str]],
+    model: str = "gemini-2.0-flash",
+    token_budget: int = LLM_BATCH_TOKEN_BUDGET,
+    max_posts: int = LLM_BATCH_MAX_POSTS,
+) -> List[Union[ContentScore, Exception]]:
+    """
+    Score many posts, packing several short posts into each request.
+
+    Cached ratings are reused; the remaining posts are packed up to token_budget
+    and max_posts per request, which avoids repeating the system prompt for
+    every post. Each returned entry is validated on its own. Posts whose entry
+    is missing or invalid, and every post of a request that fails outright, are
+    retried with single-post score_post calls.
+
+    Args:
+        posts: Sequence of (title, content) pairs
+        model: OpenAI model to use
+        token_budget: Maximum estimated tokens of post text per request
+        max_posts: Maximum posts per request
+
+    Returns:
+        list: Per post, either its ContentScore or the exception that prevented scoring
+    """
+    results: List[Union[ContentScore, Exception, None]] = [None] * len(posts)
+    cache = get_rating_cache()
+    keys = [rating_cache_key(title, content, model) for title, content in posts]
+    cached = await cache.aget_many(keys)
+
+    pending = []
+    for i, (title, content) in enumerate(posts):
+        if not (title or "").strip() or not (content or "").strip():
+            results[i] = ValueError("Title and content must be non-empty.")
+        elif keys[i] in cached:
+            results[i] = cached[keys[i]]
+        else:
+            pending.append(i)
+
+    async def score_single(i: int):
+        try:
+            results[i] = await score_post(posts[i][0], posts[i][1], model=model)
+        except Exception as e:
+            results[i] = e
+
+    async def score_group(group: List[int]):
+        if len(group) == 1:
+            await score_single(group[0])
+            return
+        try:
+            scores = await _score_packed([posts[i] for i in group], model)
+        except RuntimeError:
+            scores = [None] * len(group)
+
+        fresh = {}
+        fallback = []
+        for i, score in zip(group, scores):
+            if score is None:
+                fallback.append(i)
+            else:
+                results[i] = score
+                fresh[keys[i]] = score
+        await cache.aset_many(fresh)
+        if fallback:
+            logger.info(f"Falling back to single-post scoring for {len(fallback)} of {len(group)} posts")
+            record_retry("batch_fallback", len(fallback))
+            await asyncio.gather(*(score_single(i) for i in fallback))
+
+    groups = pack_batches([posts[i] for i in pending], token_budget, max_posts)
+    await asyncio.gather(*(score_group([pending[j] for j in group]) for group in groups))
+    return results
@@ -0,0 +1,75 @@
+#app/utils/readability.py
+from functools import lru_cache
+from typing import Sequence, Tuple
+import re
+import numpy as np
+
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s|$)")
+_WORD = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+_VOWEL_GROUP = re.compile(r"[aeiouy]+")
+
+
+@lru_cache(maxsize=200000)
+def count_syllables(word: str) -> int:
+    """
+    Estimate the syllables in an English word by counting vowel groups.
+    Args:
+        word (str): A single word
+    Returns:
+        int: Syllable count, at least 1
+    """
+    word = word.lower().split("'")[0]
+    syllables = len(_VOWEL_GROUP.findall(word))
+    # Silent trailing "e" ("make"), but not "-le" ("table") or "-ee" ("free")
+    if word.endswith("e") and not word.endswith(("le", "ee")) and syllables > 1:
+        syllables -= 1
+    return max(1, syllables)
+
+
+def readability_scores(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flesch-Kincaid grade level and Gunning Fog index for a batch of texts.
+
+    Words from the whole batch are counted together: syllables are computed once
+    per distinct word, and per-text totals are summed with np.bincount, so the
+    cost is one pass over the batch rather than one per text. Complex words for
+    Gunning Fog are words with three or more syllables.
+
+    Args:
+        texts: Texts to score
+    Returns:
+        tuple: (flesch_kincaid, gunning_fog) float arrays, 0.0 for texts without words
+    """
+    count = len(texts)
+    if count == 0:
+        return np.zeros(0), np.zeros(0)
+
+    words, owners = [], []
+    sentences = np.zeros(count)
+    for i, text in enumerate(texts):
+        text = text or ""
+        found = _WORD.findall(text)
+        words.extend(found)
+        owners.extend([i] * len(found))
+        sentences[i] = len(_SENTENCE_END.findall(text))
+
+    owners = np.asarray(owners, dtype=np.int64)
+    word_counts = np.bincount(owners, minlength=count).astype(float)
+    if words:
+        unique, inverse = np.unique(np.asarray([w.lower() for w in words]), return_inverse=True)
+        unique_syllables = np.fromiter((count_syllables(w) for w in unique), dtype=float, count=len(unique))
+        syllables_per_word = unique_syllables[inverse]
+    else:
+        syllables_per_word = np.zeros(0)
+    syllables = np.bincount(owners, weights=syllables_per_word, minlength=count)
+    complex_words = np.bincount(owners, weights=(syllables_per_word >= 3).astype(float), minlength=count)
+
+    has_words = word_counts > 0
+    # Text without terminal punctuation still counts as one sentence
+    sentences = np.where(has_words, np.maximum(sentences, 1), 1)
+    safe_words = np.where(has_words, word_counts, 1)
+    words_per_sentence = word_counts / sentences
+
+    flesch_kincaid = 0.39 * words_per_sentence + 11.8 * (syllables / safe_words) - 15.59
+    gunning_fog = 0.4 * (words_per_sentence + 100 * (complex_words / safe_words))
+    return np.where(has_words, flesch_kincaid, 0.0), np.where(has_words, gunning_fog, 0.0)
@@ -0,0 +1,34 @@
+#app/utils/text.py
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_post_text(title: str, content: str) -> str:
+    """
+    Canonical form of a post used for hashing: NFC unicode, collapsed whitespace.
+    Args:
+        title (str): The post title
+        content (str): The post content
+    Returns:
+        str: Normalized "title\\ncontent" text
+    """
+    parts = []
+    for part in (title or "", content or ""):
+        part = unicodedata.normalize("NFC", part)
+        parts.append(_WHITESPACE.sub(" ", part).strip())
+    return "\n".join(parts)
+
+
+def content_hash(title: str, content: str) -> str:
+    """
+    Stable SHA-256 hex digest of a post's normalized title and content.
+    Args:
+        title (str): The post title
+        content (str): The post content
+    Returns:
+        str: 64-character hex digest
+    """
+    return hashlib.sha256(normalize_post_text(title, content).encode("utf-8")).hexdigest()
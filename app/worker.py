@@ -0,0 +1,83 @@
+# app/worker.py
+# Run with: celery -A app.worker worker --concurrency 1
+# Start as many worker processes/nodes as needed; posts are leased so no post
+# is scored twice.
+from celery import Celery, group
+from celery.result import GroupResult
+from dataclasses import asdict
+from app.config import LEXICAL_DEDUP, REDIS_BROKER, SCORING_WORKER_FANOUT
+from app.db.session import AsyncSessionLocal, dispose_engine
+from app.services.deduplicator import DeduplicationIndex, LexicalIndex
+from app.services.rescoring import refresh_content_hashes
+from app.services.scorer import score_claimed_posts
+from app.utils.clients import close_clients
+import asyncio
+import logging
+import os
+import socket
+
+celery_app = Celery("scoring", broker=REDIS_BROKER, backend=REDIS_BROKER)
+celery_app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_track_started=True,
+)
+
+# Kept between tasks so each run only loads embeddings (and signatures) written since the last one
+_dedup_index = None
+_lexical_index = None
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def _score_claimed_posts(mode: str) -> dict:
+    global _dedup_index, _lexical_index
+    if _dedup_index is None:
+        _dedup_index = DeduplicationIndex()
+    if _lexical_index is None and LEXICAL_DEDUP:
+        _lexical_index = LexicalIndex()
+    try:
+        async with AsyncSessionLocal() as session:
+            stats = await score_claimed_posts(session, _worker_id(), _dedup_index, mode, _lexical_index)
+    finally:
+        # Pooled HTTP and asyncpg connections belong to this task's event loop
+        await close_clients()
+        await dispose_engine()
+    return asdict(stats)
+
+
+async def _refresh_content_hashes() -> int:
+    try:
+        async with AsyncSessionLocal() as session:
+            return await refresh_content_hashes(session)
+    finally:
+        await dispose_engine()
+
+
+@celery_app.task(name="scoring.refresh_content_hashes")
+def refresh_content_hashes_task() -> int:
+    """Run refresh_content_hashes() once before an incremental run is dispatched."""
+    return asyncio.run(_refresh_content_hashes())
+
+
+@celery_app.task(name="scoring.score_claimed_posts")
+def score_claimed_posts_task(mode: str = "new") -> dict:
+    """Lease and score unrated (or, in incremental mode, stale) posts until none are left."""
+    return asyncio.run(_score_claimed_posts(mode))
+
+
+def dispatch_scoring(fanout: int = SCORING_WORKER_FANOUT, mode: str = "new") -> GroupResult:
+    """
+    Queue fanout scoring tasks so idle workers across all nodes pick them up.
+
+    For mode="incremental", refresh_content_hashes_task must have run first so
+    workers see edited posts as stale.
+
+    Returns:
+        GroupResult: One result per task, each the task's ScoringStats as a dict
+    """
+    result = group(score_claimed_posts_task.s(mode) for _ in range(fanout)).apply_async()
+    logging.info(f"Dispatched {fanout} scoring tasks (group {result.id})")
+    return result
@@ -0,0 +1,206 @@
+"""
+Offline end-to-end benchmark of score_new_posts.
+
+Starts the stand-in Ollama and OpenAI servers from fake_services.py, loads a
+synthetic corpus into a local Postgres/pgvector database and runs one full
+scoring pass. Reports posts/sec, p50/p99 latency per pipeline stage and the
+peak RSS of the scoring process.
+
+The database is emptied before every run, so point --database-url at a
+scratch database, never at real data. The caches are disabled by default so
+every post reaches the stand-ins; pass --with-cache to measure a warm run.
+
+Usage:
+    createdb scoring_bench
+    python benchmarks/bench_scoring.py --database-url postgresql+asyncpg://localhost/scoring_bench \\
+        --posts 2000 --duplicate-ratio 0.1 --llm-latency-ms 800 --llm-rate-limit 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+sys.path.append(BENCH_DIR)
+
+from corpus import generate_corpus
+
+
+def _wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise SystemExit(f"Stand-in server on port {port} did not start")
+
+
+def start_fake_service(service: str, port: int, latency_ms: float, error_rate: float, rate_limit: float, seed: int):
+    process = subprocess.Popen([
+        sys.executable, os.path.join(BENCH_DIR, "fake_services.py"), service,
+        "--port", str(port),
+        "--latency-ms", str(latency_ms),
+        "--jitter-ms", str(latency_ms / 4),
+        "--error-rate", str(error_rate),
+        "--rate-limit", str(rate_limit),
+        "--seed", str(seed),
+    ])
+    _wait_for_port(port)
+    return process
+
+
+def configure_environment(args):
+    # app.config reads the environment on import, so this runs before any app import
+    os.environ.update({
+        "DATABASE_URL": args.database_url,
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{args.ollama_port}",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.openai_port}/v1",
+        "OPENAI_API_KEY": "benchmark",
+    })
+    if not args.with_cache:
+        os.environ.update({
+            "EMBEDDING_CACHE_BACKEND": "none",
+            "EMBEDDING_CACHE_MAX_ITEMS": "0",
+            "RATING_CACHE_BACKEND": "none",
+            "RATING_CACHE_MAX_ITEMS": "0",
+        })
+
+
+async def reset_database(posts):
+    from sqlalchemy import insert, text
+    from app.db.models import Post
+    from app.db.session import AsyncSessionLocal, dispose_engine, engine
+    from scripts.create_tables import init
+
+    await init()
+    async with engine.begin() as conn:
+        await conn.execute(text('TRUNCATE "AIPostRating", "Post" RESTART IDENTITY CASCADE'))
+    async with AsyncSessionLocal() as session:
+        rows = [
+            {"title": title, "content": content, "published": True, "authorAddress": "bench@example.com", "ipfsHash": f"bench-{i}"}
+            for i, (title, content) in enumerate(posts)
+        ]
+        for start in range(0, len(rows), 1000):
+            await session.execute(insert(Post), rows[start:start + 1000])
+        await session.commit()
+    # The next asyncio.run gets a new event loop; pooled connections cannot follow it
+    await dispose_engine()
+
+
+async def run_scoring():
+    from app.db.session import AsyncSessionLocal, dispose_engine
+    from app.services.pipeline import StageObserver, add_stage_observer, remove_stage_observer
+    from app.services.scorer import score_new_posts
+    from app.utils.clients import close_clients
+
+    class Recorder(StageObserver):
+        def __init__(self):
+            self.seconds = defaultdict(list)
+            self.items = defaultdict(int)
+
+        def batch_finished(self, stage, size, seconds, failed):
+            self.seconds[stage.name].append(seconds)
+            self.items[stage.name] += size
+
+    recorder = Recorder()
+    add_stage_observer(recorder)
+    try:
+        async with AsyncSessionLocal() as session:
+            began = time.perf_counter()
+            stats = await score_new_posts(session)
+            elapsed = time.perf_counter() - began
+    finally:
+        remove_stage_observer(recorder)
+        await close_clients()
+        await dispose_engine()
+    return stats, elapsed, recorder
+
+
+def report(args, stats, elapsed, recorder) -> dict:
+    done = stats.processed + stats.duplicates + stats.errors
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result = {
+        "posts": args.posts,
+        "processed": stats.processed,
+        "duplicates": stats.duplicates,
+        "errors": stats.errors,
+        "elapsed_seconds": elapsed,
+        "posts_per_second": done / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb,
+        "stages": {
+            name: {
+                "calls": len(seconds),
+                "items": recorder.items[name],
+                "p50_ms": float(np.percentile(seconds, 50) * 1000),
+                "p99_ms": float(np.percentile(seconds, 99) * 1000),
+            }
+            for name, seconds in recorder.seconds.items()
+        },
+    }
+
+    print(f"{done} posts in {elapsed:.1f} s: {result['posts_per_second']:.1f} posts/s, peak RSS {peak_rss_mb:.0f} MB")
+    print(f"processed {stats.processed}, duplicates {stats.duplicates}, errors {stats.errors}")
+    print(f"{'stage':>8} | {'calls':>6} | {'items':>6} | {'p50 ms':>9} | {'p99 ms':>9}")
+    for name, stage in result["stages"].items():
+        print(f"{name:>8} | {stage['calls']:6d} | {stage['items']:6d} | {stage['p50_ms']:9.2f} | {stage['p99_ms']:9.2f}")
+    return result
+
+
+def main(args):
+    configure_environment(args)
+    posts = generate_corpus(
+        args.posts,
+        mean_words=args.mean_words,
+        length_sigma=args.length_sigma,
+        duplicate_ratio=args.duplicate_ratio,
+        seed=args.seed,
+    )
+    services = [
+        start_fake_service("ollama", args.ollama_port, args.embed_latency_ms, args.embed_error_rate, args.embed_rate_limit, args.seed),
+        start_fake_service("openai", args.openai_port, args.llm_latency_ms, args.llm_error_rate, args.llm_rate_limit, args.seed),
+    ]
+    try:
+        asyncio.run(reset_database(posts))
+        stats, elapsed, recorder = asyncio.run(run_scoring())
+    finally:
+        for process in services:
+            process.terminate()
+            process.wait()
+
+    result = report(args, stats, elapsed, recorder)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Scratch database; it is truncated before the run")
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--mean-words", type=int, default=400)
+    parser.add_argument("--length-sigma", type=float, default=0.6)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--embed-latency-ms", type=float, default=20)
+    parser.add_argument("--embed-error-rate", type=float, default=0)
+    parser.add_argument("--embed-rate-limit", type=float, default=0, help="Requests per second; 0 disables")
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--llm-error-rate", type=float, default=0)
+    parser.add_argument("--llm-rate-limit", type=float, default=0, help="Requests per second; 0 disables")
+    parser.add_argument("--ollama-port", type=int, default=11500)
+    parser.add_argument("--openai-port", type=int, default=11600)
+    parser.add_argument("--with-cache", action="store_true", help="Keep the embedding and rating caches enabled")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
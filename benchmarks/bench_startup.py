@@ -0,0 +1,94 @@
+"""
+Import and startup time of the API process, with a guard against regressions.
+
+Each run starts a fresh interpreter that imports app.main, runs the FastAPI
+lifespan startup and checks which modules got loaded. Scoring dependencies
+(LLM/embedding SDKs, pgvector, NumPy, the DB driver) must only load once
+scoring actually runs. Exits non-zero if any of them is imported at startup or
+the median time exceeds the given budgets.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --max-import-ms 800 --max-startup-ms 100
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only the scoring path needs
+HEAVY_MODULES = [
+    "openai",
+    "langchain_ollama",
+    "ollama",
+    "pgvector",
+    "numpy",
+    "asyncpg",
+    "sqlalchemy.ext.asyncio",
+    "app.services.scorer",
+    "app.utils.openai_client",
+    "app.utils.embeddings",
+]
+
+PROBE = """
+import asyncio, json, sys, time
+began = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def startup():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+started = asyncio.run(startup())
+print(json.dumps({
+    "import_ms": (imported - began) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "loaded": [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+
+def probe() -> dict:
+    env = dict(os.environ)
+    # Settings are read at import; dummy values keep the probe self-contained
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env.setdefault("DATABASE_URL", "postgresql+asyncpg://benchmark@localhost/benchmark")
+    code = f"HEAVY = {HEAVY_MODULES!r}\n{PROBE}"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(args) -> int:
+    runs = [probe() for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    startup_ms = statistics.median(run["startup_ms"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+
+    print(f"import app.main: {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"lifespan start:  {startup_ms:8.1f} ms")
+    print(f"heavy modules:   {', '.join(loaded) if loaded else 'none'}")
+
+    failures = []
+    if loaded:
+        failures.append(f"loaded at startup: {', '.join(loaded)}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"import took {import_ms:.1f} ms > {args.max_import_ms} ms")
+    if startup_ms > args.max_startup_ms:
+        failures.append(f"startup took {startup_ms:.1f} ms > {args.max_startup_ms} ms")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=800)
+    parser.add_argument("--max-startup-ms", type=float, default=100)
+    sys.exit(main(parser.parse_args()))
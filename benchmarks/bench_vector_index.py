@@ -0,0 +1,118 @@
+"""
+Recall/latency comparison of the HNSW index against exact nearest-neighbour search.
+
+Queries are stored embeddings with gaussian noise added, so the true nearest
+neighbour is known to be close but not identical. For every quantization mode
+and ef_search value the batch LATERAL query is timed and its answers compared
+with an exact scan (index scans disabled). Quantized modes need their index
+(scripts/migrate_embedding_index.py); without it they fall back to a scan.
+
+Usage:
+    python benchmarks/bench_vector_index.py --queries 200 --ef-search 20 40 80 160
+    python benchmarks/bench_vector_index.py --quantization none halfvec binary --candidates 40
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import select, text
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.config import HNSW_EF_SEARCH
+from app.db.models import AIPostRating, EMBEDDING_INDEXES
+from app.db.session import AsyncSessionLocal
+from app.services.deduplicator import SIMILARITY_THRESHOLD, nearest_neighbours
+
+
+async def sample_queries(session, count: int, noise: float, seed: int):
+    stmt = (
+        select(AIPostRating.embedding)
+        .where(AIPostRating.embedding.is_not(None))
+        .order_by(text("random()"))
+        .limit(count)
+    )
+    rows = (await session.execute(stmt)).scalars().all()
+    if not rows:
+        raise SystemExit("No stored embeddings to benchmark against")
+    rng = np.random.default_rng(seed)
+    base = np.asarray(rows, dtype=np.float32)
+    scale = noise * np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(base.shape[1])
+    return base + rng.normal(size=base.shape).astype(np.float32) * scale
+
+
+async def index_sizes(session):
+    names = [name for name, _ in EMBEDDING_INDEXES.values()]
+    result = await session.execute(
+        text("SELECT relname, pg_relation_size(oid) FROM pg_class WHERE relname = ANY(:names)"),
+        {"names": names},
+    )
+    table_size = (await session.execute(text("""SELECT pg_total_relation_size('"AIPostRating"')"""))).scalar_one()
+    return dict(result.all()), table_size
+
+
+async def timed_search(queries, batch_size: int, ef_search: int, exact: bool, quantization: str = "none", candidates: int = 1):
+    results, latencies = [], []
+    async with AsyncSessionLocal() as session:
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start:start + batch_size]
+            async with session.begin():
+                if exact:
+                    await session.execute(text("SET LOCAL enable_indexscan = off"))
+                began = time.perf_counter()
+                results.extend(await nearest_neighbours(
+                    session, batch, ef_search=ef_search, quantization=quantization, candidates=candidates
+                ))
+                latencies.append(time.perf_counter() - began)
+    return results, np.asarray(latencies)
+
+
+def summarize(label: str, results, latencies, exact_results, batch_size: int):
+    same_post = np.mean([r[0] == e[0] for r, e in zip(results, exact_results)])
+    sim_error = np.mean([e[1] - r[1] for r, e in zip(results, exact_results)])
+    same_decision = np.mean([
+        (r[1] >= SIMILARITY_THRESHOLD) == (e[1] >= SIMILARITY_THRESHOLD)
+        for r, e in zip(results, exact_results)
+    ])
+    per_query_ms = latencies * 1000 / batch_size
+    print(
+        f"{label:>26} | recall@1 {same_post:6.3f} | sim err {sim_error:7.4f} | "
+        f"dup agree {same_decision:6.3f} | p50 {np.percentile(per_query_ms, 50):7.2f} ms | "
+        f"p99 {np.percentile(per_query_ms, 99):7.2f} ms per query"
+    )
+
+
+async def main(args):
+    async with AsyncSessionLocal() as session:
+        queries = await sample_queries(session, args.queries, args.noise, args.seed)
+        sizes, table_size = await index_sizes(session)
+
+    print(f"{len(queries)} queries, batch size {args.batch_size}, noise {args.noise}")
+    print(f"AIPostRating total size {table_size / 2**20:.1f} MB")
+    for quantization, (name, _) in EMBEDDING_INDEXES.items():
+        size = f"{sizes[name] / 2**20:.1f} MB" if name in sizes else "not built"
+        print(f"  {quantization:>8} index {name}: {size}")
+
+    exact_results, exact_latencies = await timed_search(queries, args.batch_size, HNSW_EF_SEARCH, exact=True)
+    summarize("exact", exact_results, exact_latencies, exact_results, args.batch_size)
+    for quantization in args.quantization:
+        for ef_search in args.ef_search:
+            results, latencies = await timed_search(
+                queries, args.batch_size, ef_search, exact=False, quantization=quantization, candidates=args.candidates
+            )
+            summarize(f"{quantization} ef_search={ef_search}", results, latencies, exact_results, args.batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--noise", type=float, default=0.05, help="Relative gaussian noise added to each query")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 80, 160])
+    parser.add_argument("--quantization", nargs="+", choices=sorted(EMBEDDING_INDEXES), default=["none"])
+    parser.add_argument("--candidates", type=int, default=40, help="Candidates reranked per query in quantized modes")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
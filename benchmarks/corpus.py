@@ -0,0 +1,82 @@
+"""
+Synthetic post corpus for benchmarks.
+
+Post lengths follow a log-normal distribution around a chosen mean word count.
+A duplicate_ratio share of the posts are near copies of earlier posts (a few
+words changed), which the scorer should flag as duplicates.
+"""
+import math
+import random
+from typing import List, Tuple
+
+_SYLLABLES = "ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su ta te ti to tu".split()
+
+
+def _vocabulary(size: int, rng: random.Random) -> List[str]:
+    # Large enough that unrelated posts share few words, so only real near
+    # copies look similar
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def _sentence(rng: random.Random, vocabulary: List[str], words: int) -> str:
+    text = " ".join(rng.choice(vocabulary) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _post_body(rng: random.Random, vocabulary: List[str], words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 24))
+        sentences.append(_sentence(rng, vocabulary, length))
+        words -= length
+    return " ".join(sentences)
+
+
+def _near_copy(rng: random.Random, vocabulary: List[str], content: str, edits: int) -> str:
+    words = content.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    return " ".join(words)
+
+
+def generate_corpus(
+    size: int,
+    mean_words: int = 400,
+    length_sigma: float = 0.6,
+    duplicate_ratio: float = 0.1,
+    vocabulary_size: int = 5000,
+    seed: int = 0,
+) -> List[Tuple[str, str]]:
+    """
+    Generate size (title, content) pairs.
+
+    Args:
+        size: Number of posts
+        mean_words: Mean post length in words
+        length_sigma: Log-normal sigma of the length distribution; 0 gives
+            every post mean_words words
+        duplicate_ratio: Share of posts that are near copies of an earlier post
+        vocabulary_size: Number of distinct synthetic words
+        seed: Random seed; the same arguments always give the same corpus
+
+    Returns:
+        List[Tuple[str, str]]: Posts in insertion order
+    """
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(vocabulary_size, rng)
+    posts = []
+    originals = []
+    for i in range(size):
+        if originals and rng.random() < duplicate_ratio:
+            title, content = rng.choice(originals)
+            posts.append((f"{title} (repost {i})", _near_copy(rng, vocabulary, content, edits=max(1, len(content.split()) // 100))))
+            continue
+        # Log-normal with the requested mean: mu = ln(mean) - sigma^2 / 2
+        words = max(20, int(rng.lognormvariate(math.log(mean_words) - length_sigma ** 2 / 2, length_sigma)))
+        post = (f"Synthetic post {i}: {_sentence(rng, vocabulary, 6)[:-1]}", _post_body(rng, vocabulary, words))
+        originals.append(post)
+        posts.append(post)
+    return posts
@@ -0,0 +1,184 @@
+"""
+Local stand-ins for Ollama and an OpenAI-compatible chat API, for benchmarks.
+
+Both servers answer instantly with deterministic data plus a configurable
+latency, error rate and rate limit, so scoring throughput can be measured
+without paid endpoints.
+
+- Ollama: POST /api/embed returns hashed bag-of-words vectors. Texts sharing
+  most of their words get nearly identical vectors, so duplicates in a
+  synthetic corpus are detected just like with a real model.
+- OpenAI: POST /v1/chat/completions returns a valid rating for single-post
+  prompts, or one entry per "### Post <id>" block for batch prompts, and
+  reports token usage.
+
+Usage:
+    python benchmarks/fake_services.py ollama --port 11500 --latency-ms 20
+    python benchmarks/fake_services.py openai --port 11600 --latency-ms 800 --error-rate 0.01 --rate-limit 20
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+EMBEDDING_DIM = 768
+_TOKEN = re.compile(r"\w+")
+_BATCH_POST = re.compile(r"^### Post (\d+)$", re.MULTILINE)
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> list:
+    """Unit-length hashed bag-of-words vector of text."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in _TOKEN.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dim
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector.tolist()
+
+
+def fake_rating(text: str) -> dict:
+    """A schema-valid rating derived from a hash of text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    rng = random.Random(seed)
+    return {
+        "rating": rng.randint(0, 100),
+        "justification": "Synthetic rating from the benchmark stand-in.",
+        "sentimentAnalysisLabel": rng.choice(["Very Positive", "Positive", "Neutral", "Negative", "Very Negative"]),
+        "sentimentAnalysisScore": round(rng.random(), 3),
+        "biasDetectionScore": round(rng.random(), 3),
+        "biasDetectionDirection": rng.choice(["moderate left", "neutral", "moderate right", "non-political"]),
+        "originalityScore": round(rng.random(), 3),
+        "similarityScore": round(rng.random(), 3),
+        "mainTopic": "benchmark",
+        "secondaryTopics": ["synthetic", "load-test"],
+    }
+
+
+class Behaviour:
+    """Latency, failures and a token-bucket rate limit shared by one server."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, rate_limit: float, seed: int):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self._tokens = rate_limit
+        self._updated = time.monotonic()
+
+    def _take_token(self) -> bool:
+        if self.rate_limit <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._updated) * self.rate_limit)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def apply(self):
+        """Return an error response to send instead of the real one, or None."""
+        if not self._take_token():
+            retry_after = max(1, int(1 / self.rate_limit))
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        if self.rng.random() < self.error_rate:
+            return JSONResponse({"error": {"message": "Injected failure", "type": "server_error"}}, status_code=500)
+        return None
+
+
+def create_ollama_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        error = await behaviour.apply()
+        if error is not None:
+            return error
+        body = await request.json()
+        texts = body.get("input") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        return {"model": body.get("model"), "embeddings": [fake_embedding(text) for text in texts]}
+
+    return app
+
+
+def create_openai_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        error = await behaviour.apply()
+        if error is not None:
+            return error
+        body = await request.json()
+        prompt = "\n".join(message.get("content") or "" for message in body.get("messages", []))
+        user = body["messages"][-1]["content"]
+
+        markers = list(_BATCH_POST.finditer(user))
+        if markers:
+            entries = []
+            for marker, following in zip(markers, markers[1:] + [None]):
+                post_text = user[marker.end():following.start() if following else len(user)]
+                entries.append({"id": int(marker.group(1)), **fake_rating(post_text)})
+            content = json.dumps({"results": entries})
+        else:
+            content = json.dumps(fake_rating(user))
+
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "id": f"chatcmpl-{hashlib.md5(user.encode('utf-8')).hexdigest()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", choices=["ollama", "openai"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Requests per second before HTTP 429; 0 disables")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    behaviour = Behaviour(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit, args.seed)
+    app = create_ollama_app(behaviour) if args.service == "ollama" else create_openai_app(behaviour)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -1,18 +1,54 @@
 import sys
 import os
 import asyncio
-from sqlalchemy import text
+from sqlalchemy import text, inspect
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
+from app.config import LEGACY_EMBEDDING_MODEL
 from app.db.models import Base
 from app.db.session import engine
 
+
+def add_missing_columns(conn):
+    # Tables created before a column was added to the models get it here;
+    # new columns are always nullable so existing rows stay valid
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+
+def create_missing_indexes(conn):
+    # create_all only builds indexes together with new tables; add any that
+    # were introduced after the tables already existed
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def stamp_legacy_embedding_model(conn):
+    # Ratings stored before the embedding model was recorded; duplicate checks
+    # only compare vectors of the current model and would skip them otherwise
+    if LEGACY_EMBEDDING_MODEL:
+        conn.execute(
+            text('UPDATE "AIPostRating" SET "embeddingModel" = :model '
+                 'WHERE "embeddingModel" IS NULL AND embedding IS NOT NULL'),
+            {"model": LEGACY_EMBEDDING_MODEL},
+        )
+
+
 async def init():
     async with engine.begin() as conn:
         # Ensure pgvector extension exists before table creation
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+        await conn.run_sync(stamp_legacy_embedding_model)
 
 if __name__ == "__main__":
     asyncio.run(init())
@@ -1,9 +1,32 @@
-import os
+"""
+Load .txt posts from a directory into the Post table.
+
+Files are streamed in chunks: each chunk is read by a thread pool while the
+previous one is written, and written with one multi-row INSERT. Posts whose
+content hash matches an existing post (or an earlier file in the same run)
+are skipped, so re-running the loader over the same archive inserts nothing
+new. Existing posts without a content hash get one first. With --embed, embeddings for the inserted posts are computed during the
+load and kept in the embedding cache, so the next scoring run does not have
+to request them again.
+
+Usage:
+    python scripts/load_posts.py --posts-dir archive/ --chunk-size 2000 --embed
+"""
+import argparse
 import asyncio
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from app.config import EMBED_BATCH_SIZE, EMBEDDING_CACHE_BACKEND
 from app.db.models import Post
-from app.db.session import AsyncSessionLocal
+from app.db.session import AsyncSessionLocal, dispose_engine
+from app.services.rescoring import backfill_content_hashes
+from app.utils.text import content_hash
 
 POSTS_DIR = os.path.join(os.path.dirname(__file__), "..", "posts")
 author_addresses = [
@@ -14,30 +37,136 @@ author_addresses = [
     "author_five@example.com",
     "author_six@example.com"
 ]
+# asyncpg allows 32767 bind parameters per statement; each row uses five
+MAX_CHUNK_SIZE = 6000
+
+
+def iter_post_files(posts_dir: str):
+    """Yield paths of .txt files without listing the whole directory first."""
+    with os.scandir(posts_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".txt"):
+                yield entry.path
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def read_post(path: str):
+    """(title, content) of a post file; content is empty for blank files."""
+    with open(path, "r", encoding="utf-8") as file:
+        content = file.read().strip()
+    return os.path.splitext(os.path.basename(path))[0], content
+
+
+async def read_chunk(executor: ThreadPoolExecutor, paths):
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(executor, read_post, path) for path in paths))
+
+
+async def insert_chunk(session, posts, first_index: int, seen_hashes: set) -> list:
+    """
+    Insert the posts that are not already stored and return them.
+
+    Duplicates are dropped by content hash, against the database (one indexed
+    lookup per chunk) and against earlier posts of this run.
+    """
+    rows = []
+    for offset, (title, content) in enumerate(posts):
+        digest = content_hash(title, content)
+        rows.append({
+            "title": title,
+            "content": content,
+            "published": True,
+            "authorAddress": author_addresses[(first_index + offset) % len(author_addresses)],
+            "contentHash": digest,
+        })
+
+    stored = await session.execute(select(Post.contentHash).where(Post.contentHash.in_({row["contentHash"] for row in rows})))
+    seen_hashes.update(stored.scalars())
+    new_rows = []
+    for row in rows:
+        if row["contentHash"] not in seen_hashes:
+            seen_hashes.add(row["contentHash"])
+            new_rows.append(row)
+    if not new_rows:
+        return []
+
+    # Any unique conflict (e.g. ipfsHash) means the post is already there
+    stmt = pg_insert(Post).values(new_rows).on_conflict_do_nothing().returning(Post.title, Post.content)
+    inserted = (await session.execute(stmt)).all()
+    await session.commit()
+    return inserted
+
+
+async def embed_posts(posts):
+    """Compute embeddings so they land in the embedding cache; batches run concurrently."""
+    from app.utils.embeddings import aget_post_embeddings
+
+    batches = [posts[start:start + EMBED_BATCH_SIZE] for start in range(0, len(posts), EMBED_BATCH_SIZE)]
+    # The call governor limits how many of these are in flight
+    await asyncio.gather(*(aget_post_embeddings(batch) for batch in batches))
+
+
+async def load_txt_posts(posts_dir: str = POSTS_DIR, chunk_size: int = 1000, read_workers: int = 16, embed: bool = False):
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+    if embed and EMBEDDING_CACHE_BACKEND == "none":
+        print("Warning: EMBEDDING_CACHE_BACKEND is 'none', so --embed results are not kept for scoring")
+
+    totals = {"files": 0, "inserted": 0, "duplicates": 0, "empty": 0}
+    seen_hashes = set()
+    chunks = chunked(iter_post_files(posts_dir), chunk_size)
+    try:
+        with ThreadPoolExecutor(max_workers=read_workers) as executor:
+            async with AsyncSessionLocal() as session:
+                # Posts from older loads have no hash yet and would not be recognized
+                backfilled = await backfill_content_hashes(session)
+                if backfilled:
+                    print(f"Computed content hashes for {backfilled} existing posts")
+
+                # Read the next chunk while the current one is written
+                paths = next(chunks, None)
+                pending = asyncio.ensure_future(read_chunk(executor, paths)) if paths else None
+                try:
+                    while pending is not None:
+                        read = await pending
+                        paths = next(chunks, None)
+                        pending = asyncio.ensure_future(read_chunk(executor, paths)) if paths else None
+
+                        posts = [(title, content) for title, content in read if content]
+                        totals["empty"] += len(read) - len(posts)
+                        inserted = await insert_chunk(session, posts, totals["files"], seen_hashes)
+                        totals["files"] += len(read)
+                        totals["inserted"] += len(inserted)
+                        totals["duplicates"] += len(posts) - len(inserted)
+                        if embed and inserted:
+                            await embed_posts([(title, content) for title, content in inserted])
+                        print(f"{totals['files']} files read, {totals['inserted']} posts inserted")
+                finally:
+                    if pending is not None:
+                        pending.cancel()
+    finally:
+        if embed:
+            from app.utils.clients import close_clients
+            await close_clients()
+        await dispose_engine()
+
+    if totals["inserted"]:
+        print(f"Inserted {totals['inserted']} posts into the database.")
+    else:
+        print("No new posts found to insert.")
+    print(f"Skipped {totals['duplicates']} duplicates and {totals['empty']} empty files.")
+    return totals
 
-async def load_txt_posts():
-    async with AsyncSessionLocal() as session:  # type: AsyncSession
-        files = [f for f in os.listdir(POSTS_DIR) if f.endswith('.txt')]
-        posts_to_add = []
-
-        for idx, filename in enumerate(files):
-            filepath = os.path.join(POSTS_DIR, filename)
-            with open(filepath, "r", encoding="utf-8") as file:
-                content = file.read().strip()
-            if not content:
-                print(f"Skipping empty file: {filename}")
-                continue
-            title = os.path.splitext(filename)[0]
-            author = author_addresses[idx % len(author_addresses)]
-            post = Post(title=title, content=content, published=True, authorAddress=author)
-            posts_to_add.append(post)
-
-        if posts_to_add:
-            session.add_all(posts_to_add)
-            await session.commit()
-            print(f"Inserted {len(posts_to_add)} posts into the database.")
-        else:
-            print("No valid posts found to insert.")
 
 if __name__ == "__main__":
-    asyncio.run(load_txt_posts())
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts-dir", default=POSTS_DIR)
+    parser.add_argument("--chunk-size", type=int, default=1000, help=f"Posts per INSERT (at most {MAX_CHUNK_SIZE})")
+    parser.add_argument("--read-workers", type=int, default=16, help="Threads reading files")
+    parser.add_argument("--embed", action="store_true", help="Compute embeddings into the embedding cache while loading")
+    args = parser.parse_args()
+    asyncio.run(load_txt_posts(args.posts_dir, args.chunk_size, args.read_workers, args.embed))
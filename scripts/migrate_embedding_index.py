@@ -0,0 +1,82 @@
+"""
+Build the embedding index for EMBEDDING_QUANTIZATION on an existing database.
+
+The index is created with CREATE INDEX CONCURRENTLY, so scoring and the API
+keep working while existing rows are indexed. An invalid index left behind by
+an interrupted build is dropped and rebuilt. With --drop-unused, the indexes
+for the other quantization modes are dropped afterwards.
+
+Usage:
+    EMBEDDING_QUANTIZATION=halfvec python scripts/migrate_embedding_index.py --drop-unused
+"""
+import argparse
+import asyncio
+import os
+import sys
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.config import EMBEDDING_QUANTIZATION, HNSW_M, HNSW_EF_CONSTRUCTION
+from app.db.models import EMBEDDING_INDEXES
+from app.db.session import engine
+
+# halfvec and binary_quantize were added in pgvector 0.7.0
+MIN_PGVECTOR_VERSION = (0, 7, 0)
+
+
+def _version(value: str):
+    return tuple(int(part) for part in value.split(".")[:3])
+
+
+async def index_state(conn, name: str):
+    """None if the index does not exist, else whether it is valid."""
+    result = await conn.execute(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": name},
+    )
+    return result.scalar_one_or_none()
+
+
+async def migrate(quantization: str, drop_unused: bool, maintenance_work_mem: str):
+    name, expression = EMBEDDING_INDEXES[quantization]
+    async with engine.connect() as conn:
+        # CONCURRENTLY cannot run inside a transaction block
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        if quantization != "none":
+            version = (await conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))).scalar_one_or_none()
+            if version is None or _version(version) < MIN_PGVECTOR_VERSION:
+                raise SystemExit(f"pgvector >= 0.7.0 is required for {quantization} indexes (found {version})")
+
+        if maintenance_work_mem:
+            await conn.execute(text(f"SET maintenance_work_mem = '{maintenance_work_mem}'"))
+
+        state = await index_state(conn, name)
+        if state is False:
+            print(f"Dropping invalid index {name} left by an interrupted build")
+            await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+            state = None
+        if state is None:
+            print(f"Building {name} ({quantization}); this can take a while on large tables")
+            await conn.execute(text(
+                f'CREATE INDEX CONCURRENTLY "{name}" ON "AIPostRating" USING hnsw ({expression}) '
+                f"WITH (m = {int(HNSW_M)}, ef_construction = {int(HNSW_EF_CONSTRUCTION)})"
+            ))
+        else:
+            print(f"{name} already exists")
+
+        if drop_unused:
+            for other, (other_name, _) in EMBEDDING_INDEXES.items():
+                if other != quantization:
+                    print(f"Dropping {other_name} ({other}) if present")
+                    await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{other_name}"'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quantization", choices=sorted(EMBEDDING_INDEXES), default=EMBEDDING_QUANTIZATION)
+    parser.add_argument("--drop-unused", action="store_true", help="Drop the indexes of the other modes")
+    parser.add_argument("--maintenance-work-mem", default="", help="e.g. 2GB; HNSW builds are much faster when the graph fits")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.quantization, args.drop_unused, args.maintenance_work_mem))